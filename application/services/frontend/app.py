@@ -1,9 +1,8 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+
+# pandas, NumPy, Plotly and the simulation modules are imported inside the pages
+# and figure builders that use them, so the first page paints without waiting
+# for the others' dependencies.
 
 # Page config
 st.set_page_config(
@@ -116,7 +115,7 @@ def show_pilar_assessment():
         respect = st.slider("Respect", 1, 10, 5, help="Trust in colleagues' abilities")
         
         # Calculate viability score
-        viability = np.mean([prospects, involved, liked, agency, respect])
+        viability = (prospects + involved + liked + agency + respect) / 5
         
         if viability >= 7:
             status = "High Viability"
@@ -145,9 +144,11 @@ def show_pilar_assessment():
                 st.warning(f"⚠ {force}: Potential negative force")
 
 def show_hypothesis_testing():
+    from sweep import SERVER_WORKERS, grid, iter_sweep, levels
+    
     st.header("Hypothesis Testing Framework")
     
-    tab1, tab2, tab3 = st.tabs(["Hypothesis Overview", "Simulation", "Results"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Hypothesis Overview", "Simulation", "Parameter Sweep", "Results"])
     
     with tab1:
         st.subheader("Research Hypotheses")
@@ -182,20 +183,51 @@ def show_hypothesis_testing():
         
         with col1:
             st.markdown("**Simulation Parameters**")
-            n_agents = st.slider("Number of Agents", 5, 50, 20)
+            n_agents = st.select_slider("Number of Agents", [20, 50, 100, 1000, 10_000, 100_000], 20)
             hierarchy_level = st.slider("Hierarchy Level", 0.0, 1.0, 0.3)
             inequality_aversion = st.slider("Inequality Aversion", 0.0, 1.0, 0.7)
+            steps = st.slider("Time Steps", 10, 1000, 200)
             
             if st.button("Run Simulation"):
-                results = run_pilar_simulation(n_agents, hierarchy_level, inequality_aversion)
-                st.session_state.sim_results = results
+                st.session_state.sim_params = (n_agents, hierarchy_level, inequality_aversion, steps)
         
         with col2:
-            if 'sim_results' in st.session_state:
-                fig = plot_simulation_results(st.session_state.sim_results)
-                st.plotly_chart(fig, use_container_width=True)
+            if 'sim_params' in st.session_state:
+                results_fig, trajectory_fig = simulation_figures(*st.session_state.sim_params)
+                st.plotly_chart(results_fig, use_container_width=True)
+                st.plotly_chart(trajectory_fig, use_container_width=True)
     
     with tab3:
+        st.subheader("Hierarchy × Inequality Aversion Sweep")
+        st.markdown("Steady-state mean viability over a grid of hierarchy levels and inequality aversion (H3, H5). Finished cells are cached, so growing the grid only runs new cells.")
+        
+        col1, col2 = st.columns([1, 2])
+        
+        with col1:
+            points = st.slider("Grid Points per Axis", 2, 50, 20)
+            agent_counts = st.multiselect("Number of Agents", [50, 200, 1000, 5000], default=[200])
+            sweep_steps = st.slider("Time Steps", 10, 1000, 200, key="sweep_steps")
+            run_sweep = st.button("Run Sweep")
+        
+        with col2:
+            if run_sweep and agent_counts:
+                axis = levels(points)
+                cells = grid(points, agent_counts)
+                progress = st.progress(0.0)
+                chart = st.empty()
+                records = []
+                for record in iter_sweep(cells, sweep_steps, workers=SERVER_WORKERS):
+                    records.append(record)
+                    # Redraw about twenty times per sweep rather than per cell
+                    if len(records) % max(1, len(cells) // 20) == 0 or len(records) == len(cells):
+                        progress.progress(len(records) / len(cells), text=f"{len(records)}/{len(cells)} cells")
+                        fig = plot_sweep_heatmap(records, axis, agent_counts)
+                        chart.plotly_chart(fig, use_container_width=True)
+                st.session_state.sweep_figure = fig
+            elif 'sweep_figure' in st.session_state:
+                st.plotly_chart(st.session_state.sweep_figure, use_container_width=True)
+    
+    with tab4:
         st.subheader("Research Findings")
         st.markdown("""
         ### Key Findings from Literature Analysis
@@ -256,33 +288,48 @@ def show_case_studies():
         st.markdown(case['outcome'])
         
         # Simulate case study data
-        fig = create_case_study_visualization(selected_case)
+        horizon = st.select_slider("Time Horizon", [100, 1000, 10_000, 100_000], 100)
+        fig = create_case_study_visualization(selected_case, horizon)
         st.plotly_chart(fig, use_container_width=True)
 
 def show_research_database():
+    import pandas as pd
+    from research_db import PAGE_SIZE
+    
     st.header("Research Database")
     
     tab1, tab2, tab3 = st.tabs(["Documents", "Researchers", "Theories"])
     
     with tab1:
-        st.subheader("Research Documents")
+        st.subheader("Research Documents and Q&A Pairs")
         
-        # Mock document database
-        docs = pd.DataFrame({
-            'Title': [
-                'Prosocial behaviors in nonhuman animals',
-                'Sub-group level selection in hominins', 
-                'PILAR Model Development',
-                'Cultural Transformation Theory',
-                'Inequality Aversion in Primates'
-            ],
-            'Type': ['Abstract', 'Abstract', 'Model', 'Theory', 'Research'],
-            'Year': [2020, 2021, 2019, 2018, 2019],
-            'Citations': [45, 23, 12, 67, 34],
-            'Relevance': ['High', 'High', 'Critical', 'Medium', 'High']
-        })
+        kinds = {"qa": "Q&A Pairs", "chunks": "Passages", "documents": "Documents"}
+        kind = st.radio("Search In", list(kinds), format_func=kinds.get, horizontal=True)
+        query = st.text_input("Full-text Search", placeholder="e.g. inequality aversion")
+        
+        facets = research_facets()
+        filters = {}
+        columns = st.columns(4 if kind == "qa" else 1)
+        for column, name in zip(columns, ["source", "theme", "hypothesis", "theory"]):
+            choice = column.selectbox(name.title(), ["All"] + facets[name], key=f"db_{name}")
+            filters[name] = None if choice == "All" else choice
+        
+        page = st.number_input("Page", min_value=1, value=1, step=1)
+        total, names, rows, ranked = search_research(kind, query, filters, page - 1)
+        pages = max(1, -(-total // PAGE_SIZE))
+        if page > pages:
+            page = pages
+            total, names, rows, ranked = search_research(kind, query, filters, page - 1)
         
-        st.dataframe(docs, use_container_width=True)
+        order = "ranked by relevance" if ranked else "in dataset order"
+        st.caption(f"{total:,} matches · page {page} of {pages:,} · {order}")
+        st.dataframe(pd.DataFrame(rows, columns=names), use_container_width=True, hide_index=True)
+        
+        if st.button("Refresh Index"):
+            research_store().sync()
+            search_research.clear()
+            research_facets.clear()
+            st.rerun()
     
     with tab2:
         st.subheader("Key Researchers")
@@ -321,8 +368,35 @@ def show_research_database():
         
         st.dataframe(theories, use_container_width=True)
 
+@st.cache_resource(show_spinner="Indexing the research corpus…")
+def research_store():
+    """Process-wide research database, brought up to date with the corpus and datasets on first use"""
+    from research_db import ResearchStore
+    
+    store = ResearchStore()
+    store.sync()
+    return store
+
+@st.cache_data(max_entries=16)
+def research_facets():
+    """Filter values for the research database"""
+    return research_store().facets()
+
+@st.cache_data(max_entries=512, ttl=600)
+def search_research(kind, query, filters, page):
+    """One page of research database results; only this page is sent to the browser"""
+    from research_db import KINDS
+    
+    # Drop filters that do not apply to this kind (e.g. theme on documents)
+    filters = {k: v for k, v in filters.items() if k in KINDS[kind]["filters"]}
+    return research_store().search(kind, query, filters, page)
+
+@st.cache_data
 def create_pilar_network():
     """Create network visualization of PILAR forces"""
+    import numpy as np
+    import plotly.graph_objects as go
+    
     fig = go.Figure()
     
     # Node positions (pentagon)
@@ -332,7 +406,23 @@ def create_pilar_network():
     
     labels = ['Prospects', 'Involved', 'Liked', 'Agency', 'Respect']
     
-    # Add nodes
+    # All 20 force connections as one trace, segments separated by None
+    edge_x, edge_y = [], []
+    for i in range(5):
+        for j in range(5):
+            if i != j:
+                edge_x += [x[i], x[j], None]
+                edge_y += [y[i], y[j], None]
+    fig.add_trace(go.Scatter(
+        x=edge_x, y=edge_y,
+        mode='lines',
+        line=dict(width=1, color='gray'),
+        hoverinfo='skip',
+        showlegend=False,
+        opacity=0.3
+    ))
+    
+    # Add nodes on top of the edges
     fig.add_trace(go.Scatter(
         x=x, y=y,
         mode='markers+text',
@@ -342,18 +432,6 @@ def create_pilar_network():
         name="PILAR Pillars"
     ))
     
-    # Add force connections (simplified)
-    for i in range(5):
-        for j in range(5):
-            if i != j:
-                fig.add_trace(go.Scatter(
-                    x=[x[i], x[j]], y=[y[i], y[j]],
-                    mode='lines',
-                    line=dict(width=1, color='gray'),
-                    showlegend=False,
-                    opacity=0.3
-                ))
-    
     fig.update_layout(
         title="PILAR Force Network",
         showlegend=False,
@@ -364,8 +442,11 @@ def create_pilar_network():
     
     return fig
 
+@st.cache_data(max_entries=1000)
 def create_pilar_radar(values):
     """Create radar chart for PILAR assessment"""
+    import plotly.graph_objects as go
+    
     categories = ['Prospects', 'Involved', 'Liked', 'Agency', 'Respect']
     
     fig = go.Figure()
@@ -411,28 +492,29 @@ def analyze_forces(prospects, involved, liked, agency, respect):
     
     return forces
 
-def run_pilar_simulation(n_agents, hierarchy, inequality_aversion):
-    """Run simplified PILAR simulation"""
-    np.random.seed(42)
-    
-    # Generate agent data
-    agents = pd.DataFrame({
-        'agent_id': range(n_agents),
-        'prospects': np.random.normal(5 + hierarchy, 2, n_agents),
-        'involved': np.random.normal(6 - hierarchy*2, 1.5, n_agents),
-        'liked': np.random.normal(5 + inequality_aversion, 1.5, n_agents),
-        'agency': np.random.normal(6 - hierarchy*3, 2, n_agents),
-        'respect': np.random.normal(5 + inequality_aversion*2, 1.5, n_agents)
-    })
-    
-    # Clip values to 1-10 range
-    for col in ['prospects', 'involved', 'liked', 'agency', 'respect']:
-        agents[col] = np.clip(agents[col], 1, 10)
-    
-    return agents
+@st.cache_data(max_entries=32)
+def run_pilar_simulation(n_agents, hierarchy, inequality_aversion, steps=200):
+    """Run the PILAR agent simulation; returns its per-step summaries and the final agent states"""
+    import pandas as pd
+    from simulation import PILLARS, simulate
+    
+    trajectory = simulate(n_agents, steps, hierarchy, inequality_aversion, seed=42)
+    agents = pd.DataFrame(trajectory.final, columns=list(PILLARS))
+    agents.insert(0, 'agent_id', range(n_agents))
+    return trajectory, agents
+
+@st.cache_data(max_entries=32)
+def simulation_figures(n_agents, hierarchy, inequality_aversion, steps):
+    """Agent distribution and trajectory figures for one set of simulation parameters"""
+    trajectory, results = run_pilar_simulation(n_agents, hierarchy, inequality_aversion, steps)
+    return plot_simulation_results(results), plot_simulation_trajectory(trajectory)
 
 def plot_simulation_results(results):
     """Plot simulation results"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from downsample import histogram, lttb
+    
     fig = make_subplots(
         rows=2, cols=3,
         subplot_titles=['Prospects', 'Involved', 'Liked', 'Agency', 'Respect', 'Overall'],
@@ -446,17 +528,20 @@ def plot_simulation_results(results):
         row = (i // 3) + 1
         col = (i % 3) + 1
         
+        # Binned here so the trace size does not grow with the number of agents
+        centers, counts, width = histogram(results[pillar], bins=36, value_range=(1, 10))
         fig.add_trace(
-            go.Histogram(x=results[pillar], name=pillar.title()),
+            go.Bar(x=centers, y=counts, width=width, name=pillar.title()),
             row=row, col=col
         )
     
-    # Overall viability scatter
+    # Overall viability scatter, thinned to at most MAX_POINTS agents
     results['viability'] = results[pillars].mean(axis=1)
+    keep = lttb(results.index, results['viability'])
     fig.add_trace(
         go.Scatter(
-            x=results.index, 
-            y=results['viability'],
+            x=results.index[keep], 
+            y=results['viability'].iloc[keep],
             mode='markers',
             name='Viability'
         ),
@@ -466,24 +551,80 @@ def plot_simulation_results(results):
     fig.update_layout(height=600, showlegend=False, title="Simulation Results")
     return fig
 
-def create_case_study_visualization(case_name):
+def plot_simulation_trajectory(trajectory):
+    """Plot mean pillar strengths and viability over the simulated steps"""
+    import numpy as np
+    import plotly.graph_objects as go
+    from downsample import lttb
+    from simulation import PILLARS
+    
+    steps = np.arange(len(trajectory.viability))
+    fig = go.Figure()
+    for i, pillar in enumerate(PILLARS):
+        keep = lttb(steps, trajectory.mean[:, i])
+        fig.add_trace(go.Scatter(x=steps[keep], y=trajectory.mean[keep, i], name=pillar.title()))
+    keep = lttb(steps, trajectory.viability)
+    fig.add_trace(go.Scatter(x=steps[keep], y=trajectory.viability[keep], name='Viability', line=dict(color='black', width=3)))
+    
+    fig.update_layout(
+        title="Mean Pillar Strength over Time",
+        xaxis_title="Step",
+        yaxis_title="Pillar Strength",
+        height=400
+    )
+    
+    return fig
+
+def plot_sweep_heatmap(records, axis, agent_counts):
+    """Heatmap of mean viability over hierarchy × inequality aversion, one panel per group size"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from sweep import viability_grid
+    
+    fig = make_subplots(rows=1, cols=len(agent_counts), subplot_titles=[f"{n} agents" for n in agent_counts])
+    
+    for i, n in enumerate(agent_counts):
+        fig.add_trace(
+            go.Heatmap(z=viability_grid(records, axis, n), x=axis, y=axis, coloraxis="coloraxis"),
+            row=1, col=i + 1
+        )
+        fig.update_xaxes(title_text="Inequality Aversion", row=1, col=i + 1)
+    fig.update_yaxes(title_text="Hierarchy Level", row=1, col=1)
+    
+    fig.update_layout(
+        title="Mean Viability",
+        coloraxis=dict(colorscale="Viridis", cmin=1, cmax=10),
+        height=450
+    )
+    
+    return fig
+
+@st.cache_data(max_entries=16)
+def create_case_study_visualization(case_name, horizon=100):
     """Create visualization for case study"""
-    # Mock time series data for case study
-    time = np.arange(0, 100, 1)
+    import numpy as np
+    import plotly.graph_objects as go
+    from downsample import lttb
+    
+    # Mock time series data for case study, seeded so the cached figure is reproducible
+    rng = np.random.default_rng(42)
+    time = np.arange(0, horizon, 1)
     
     if case_name == "Primate Troops in Savannah":
-        prospects = 3 + 2 * np.sin(time/20) + np.random.normal(0, 0.5, len(time))
-        agency = 4 + 3 * np.cos(time/15) + np.random.normal(0, 0.3, len(time))
+        prospects = 3 + 2 * np.sin(time/20) + rng.normal(0, 0.5, len(time))
+        agency = 4 + 3 * np.cos(time/15) + rng.normal(0, 0.3, len(time))
     elif case_name == "Healthcare Research Teams":
-        prospects = 6 + np.random.normal(0, 1, len(time))
-        agency = 3 + 2 * (time/100) + np.random.normal(0, 0.5, len(time))
+        prospects = 6 + rng.normal(0, 1, len(time))
+        agency = 3 + 2 * (time/horizon) + rng.normal(0, 0.5, len(time))
     else:  # Online Learning
-        prospects = 5 + np.random.normal(0, 0.8, len(time))
-        agency = 4 + 1.5 * np.tanh((time-50)/20) + np.random.normal(0, 0.4, len(time))
+        prospects = 5 + rng.normal(0, 0.8, len(time))
+        agency = 4 + 1.5 * np.tanh((time - horizon/2)/(horizon/5)) + rng.normal(0, 0.4, len(time))
     
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=time, y=prospects, name='Prospects', line=dict(color='blue')))
-    fig.add_trace(go.Scatter(x=time, y=agency, name='Agency', line=dict(color='red')))
+    keep = lttb(time, prospects)
+    fig.add_trace(go.Scatter(x=time[keep], y=prospects[keep], name='Prospects', line=dict(color='blue')))
+    keep = lttb(time, agency)
+    fig.add_trace(go.Scatter(x=time[keep], y=agency[keep], name='Agency', line=dict(color='red')))
     
     fig.update_layout(
         title=f"PILAR Dynamics: {case_name}",
@@ -0,0 +1,49 @@
+"""Server-side reduction of large series before they are sent to the browser.
+
+Histograms are binned with NumPy and drawn as bars, and long lines and scatters
+are thinned with Largest-Triangle-Three-Buckets, which keeps peaks, troughs and
+trends. Either way a trace carries at most MAX_POINTS points, however many
+agents or steps produced it.
+"""
+
+import numpy as np
+
+MAX_POINTS = 2000
+
+
+def lttb(x, y, n_out=MAX_POINTS):
+    """Indices of `n_out` points of (x, y) chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; the interior is split into
+    `n_out - 2` buckets, and each bucket keeps the point forming the largest
+    triangle with the previously kept point and the next bucket's mean.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    n_out = max(int(n_out), 3)
+    if n <= n_out:
+        return np.arange(n)
+
+    buckets = n_out - 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(buckets):
+        lo, hi = edges[b], edges[b + 1]
+        cx, cy = (mean_x[b + 1], mean_y[b + 1]) if b + 1 < buckets else (x[-1], y[-1])
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+def histogram(values, bins=36, value_range=None):
+    """(bin centres, counts, bin width) of `values`, for drawing as a bar trace."""
+    counts, edges = np.histogram(np.asarray(values), bins=bins, range=value_range)
+    return (edges[:-1] + edges[1:]) / 2, counts, edges[1] - edges[0]
@@ -0,0 +1,392 @@
+"""SQLite store with full-text search over the research corpus, its chunks and the Q&A datasets.
+
+    python research_db.py build                                   # index the default inputs
+    python research_db.py search "inequality aversion" --kind qa --theory "Social Network Analysis (SNA)"
+
+Documents come from the ingest output (processing/build/corpus), chunks from
+chunker.py's JSONL, and Q&A pairs from any number of JSONL datasets. Each input
+file is recorded with its size, mtime and content hash. `sync` skips unchanged
+files, indexes only the new rows of a JSONL file that grew by appending (as
+amplify.py's output does), and reindexes anything else that changed.
+
+Q&A rows carry no labels, so theme, hypothesis and theory are recovered by
+matching the generator's lists against the question, then the answer. The lists
+live in processing/labels.py, loaded by path as the processing scripts are not a
+package. Amplified rows that match nothing inherit the labels of their `seed_id`
+row in the seed dataset, processing/build/qa.jsonl by default, which is the file
+the pipeline's amplify stage reads.
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parents[2]
+LABELS = ROOT / "processing" / "labels.py"
+DEFAULT_DB = HERE / ".cache" / "research.sqlite"
+DEFAULT_CORPUS = ROOT / "processing" / "build" / "corpus"
+DEFAULT_CHUNKS = ROOT / "processing" / "build" / "chunks.jsonl"
+DEFAULT_SEED = ROOT / "processing" / "build" / "qa.jsonl"
+DEFAULT_QA = [DEFAULT_SEED, ROOT / "processing" / "build" / "amplified.jsonl"]
+PAGE_SIZE = 25
+# bm25 ordering scores every match; past this many, pages come in dataset order instead
+RANK_LIMIT = 20_000
+SNIPPET_TOKENS = 32
+WORD = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inputs (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT, rows INTEGER);
+CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, input TEXT, source TEXT, title TEXT, pages INTEGER, text TEXT);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, text, content='documents', content_rowid='id');
+CREATE TABLE IF NOT EXISTS chunks (id INTEGER PRIMARY KEY, input TEXT, source TEXT, byte_start INTEGER, byte_end INTEGER, text TEXT);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='chunks', content_rowid='id');
+CREATE TABLE IF NOT EXISTS qa (id INTEGER PRIMARY KEY, input TEXT, line INTEGER, question TEXT, answer TEXT,
+                               source TEXT, theme TEXT, hypothesis TEXT, theory TEXT);
+CREATE VIRTUAL TABLE IF NOT EXISTS qa_fts USING fts5(question, answer, content='qa', content_rowid='id');
+CREATE INDEX IF NOT EXISTS documents_input ON documents (input);
+CREATE INDEX IF NOT EXISTS chunks_input ON chunks (input);
+CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source);
+CREATE INDEX IF NOT EXISTS qa_input ON qa (input, line);
+CREATE INDEX IF NOT EXISTS qa_source ON qa (source);
+CREATE INDEX IF NOT EXISTS qa_theme ON qa (theme);
+CREATE INDEX IF NOT EXISTS qa_hypothesis ON qa (hypothesis);
+CREATE INDEX IF NOT EXISTS qa_theory ON qa (theory);
+"""
+
+# Per kind: table, its FTS columns, the filterable columns, and the columns shown (the
+# FTS column named by `snippet` is replaced by a highlighted excerpt when searching)
+KINDS = {
+    "qa": {"table": "qa", "fts": ("question", "answer"), "filters": ("source", "theme", "hypothesis", "theory"),
+           "columns": ("question", "answer", "source", "theme", "hypothesis", "theory"), "snippet": None},
+    "chunks": {"table": "chunks", "fts": ("text",), "filters": ("source",),
+               "columns": ("source", "byte_start", "byte_end", "text"), "snippet": "text"},
+    "documents": {"table": "documents", "fts": ("title", "text"), "filters": ("source",),
+                  "columns": ("title", "source", "pages", "text"), "snippet": "text"},
+}
+
+
+def load_labels(path=LABELS):
+    """(core_themes, hypotheses, theories) from processing/labels.py."""
+    spec = importlib.util.spec_from_file_location("_qa_labels", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.core_themes, module.hypotheses, module.theories
+
+
+core_themes, hypotheses, theories = load_labels()
+
+
+def _aliases(theory):
+    # "Social Identity Theory (SIT)" is also written "Social Identity Theory" or "SIT"
+    match = re.match(r"(.*?)\s*\((.*?)\)$", theory)
+    return [theory, *match.groups()] if match else [theory]
+
+
+THEORY_PATTERNS = [(theory, re.compile("|".join(rf"\b{re.escape(a)}\b" for a in _aliases(theory)))) for theory in theories]
+
+
+def qa_labels(question, answer):
+    """(theme, hypothesis, theory) named in a Q&A pair, None for any that is not found."""
+    theme = next((t for t in core_themes if t in question), None)
+    hypothesis = next((h for h in hypotheses if h.rstrip(".") in question), None)
+    theory = None
+    for text in (question, answer):
+        found = [(m.start(), t) for t, pattern in THEORY_PATTERNS if (m := pattern.search(text))]
+        if found:
+            theory = min(found)[1]
+            break
+    return theme, hypothesis, theory
+
+
+def fts_query(text):
+    """Quote each word so user input cannot break FTS5 syntax; the last word matches as a prefix."""
+    words = WORD.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+
+def _hash_prefix(path, size):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = size
+        while remaining > 0:
+            block = f.read(min(1 << 20, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+
+class ResearchStore:
+    def __init__(self, path=DEFAULT_DB):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Streamlit serves sessions from several threads; they only read after sync()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # Indexing
+
+    def _recorded(self, path):
+        found = self.db.execute("SELECT size, mtime_ns, sha256, rows FROM inputs WHERE path = ?", (path,)).fetchone()
+        return dict(zip(("size", "mtime_ns", "sha256", "rows"), found)) if found else None
+
+    def _record(self, path, size, mtime_ns, rows):
+        self.db.execute("INSERT OR REPLACE INTO inputs VALUES (?, ?, ?, ?, ?)",
+                        (path, size, mtime_ns, _hash_prefix(path, size), rows))
+
+    def _drop(self, kind, path):
+        spec = KINDS[kind]
+        cols = ", ".join(spec["fts"])
+        self.db.execute(f"INSERT INTO {spec['table']}_fts({spec['table']}_fts, rowid, {cols}) "
+                        f"SELECT 'delete', id, {cols} FROM {spec['table']} WHERE input = ?", (path,))
+        self.db.execute(f"DELETE FROM {spec['table']} WHERE input = ?", (path,))
+        self.db.execute("DELETE FROM inputs WHERE path = ?", (path,))
+
+    def _index_fts(self, kind, path, first_id):
+        spec = KINDS[kind]
+        cols = ", ".join(spec["fts"])
+        self.db.execute(f"INSERT INTO {spec['table']}_fts(rowid, {cols}) "
+                        f"SELECT id, {cols} FROM {spec['table']} WHERE input = ? AND id >= ?", (path, first_id))
+
+    def _next_id(self, table):
+        return self.db.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    def _changed(self, path):
+        """'same', 'grown' (old content is a prefix of the file) or 'changed'."""
+        stat = os.stat(path)
+        recorded = self._recorded(path)
+        if recorded is None:
+            return "changed", stat, recorded
+        if recorded["size"] == stat.st_size and recorded["mtime_ns"] == stat.st_mtime_ns:
+            return "same", stat, recorded
+        if stat.st_size >= recorded["size"] and _hash_prefix(path, recorded["size"]) == recorded["sha256"]:
+            if stat.st_size == recorded["size"]:
+                # Touched but identical
+                self.db.execute("UPDATE inputs SET mtime_ns = ? WHERE path = ?", (stat.st_mtime_ns, path))
+                return "same", stat, recorded
+            return "grown", stat, recorded
+        return "changed", stat, recorded
+
+    def _sync_documents(self, corpus_dir, stats):
+        manifest_path = Path(corpus_dir) / "ingest.json"
+        if not manifest_path.exists():
+            return set(), {}
+        with open(manifest_path, encoding="utf-8") as f:
+            documents = json.load(f)["documents"]
+        seen, outputs = set(), {}
+        for doc_id, entry in documents.items():
+            path = str(Path(corpus_dir) / entry["output"])
+            outputs[doc_id] = path
+            if not os.path.exists(path):
+                continue
+            seen.add(path)
+            state, stat, _ = self._changed(path)
+            if state == "same":
+                continue
+            self._drop("documents", path)
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            heading = re.search(r"^#\s+(.+)$", text, re.MULTILINE)
+            title = heading.group(1).strip() if heading else Path(doc_id).stem.replace("-", " ").replace("_", " ")
+            first_id = self._next_id("documents")
+            self.db.execute("INSERT INTO documents (input, source, title, pages, text) VALUES (?, ?, ?, ?, ?)",
+                            (path, doc_id, title, entry.get("pages"), text))
+            self._index_fts("documents", path, first_id)
+            self._record(path, stat.st_size, stat.st_mtime_ns, 1)
+            stats["documents"] += 1
+        return seen, outputs
+
+    def _iter_jsonl(self, path, offset):
+        """(byte position after the last complete line, records) from `offset`; a half-written last line is left out."""
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        records = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        return offset + end, records
+
+    def _sync_jsonl(self, kind, path, insert, stats):
+        state, stat, recorded = self._changed(path)
+        if state == "same":
+            return
+        if state == "changed":
+            self._drop(kind, path)
+            offset, start_row = 0, 0
+        else:
+            offset, start_row = recorded["size"], recorded["rows"]
+        size, records = self._iter_jsonl(path, offset)
+        first_id = self._next_id(KINDS[kind]["table"])
+        insert(path, start_row, records)
+        self._index_fts(kind, path, first_id)
+        # Only the complete lines count as indexed; a partial tail is picked up next time
+        mtime = stat.st_mtime_ns if size == stat.st_size else -1
+        self._record(path, size, mtime, start_row + len(records))
+        stats[kind] += len(records)
+
+    def sync(self, corpus_dir=DEFAULT_CORPUS, chunks_path=DEFAULT_CHUNKS, qa_paths=DEFAULT_QA, seed_path=DEFAULT_SEED):
+        """Bring the store in line with the inputs; returns the number of rows indexed per kind.
+
+        `seed_path` is the dataset amplify.py read; it is indexed first so amplified
+        rows can take labels from their seed rows.
+        """
+        stats = {"documents": 0, "chunks": 0, "qa": 0}
+        with self.db:
+            seen, outputs = self._sync_documents(corpus_dir, stats)
+
+            def insert_chunks(path, start_row, records):
+                texts = {}
+                rows = []
+                for r in records:
+                    text = r.get("text")
+                    if text is None and r["source"] in outputs:
+                        if r["source"] not in texts:
+                            with open(outputs[r["source"]], "rb") as f:
+                                texts[r["source"]] = f.read()
+                        text = texts[r["source"]][r["start"]:r["end"]].decode("utf-8", "replace")
+                    rows.append((path, r["source"], r["start"], r["end"], text))
+                self.db.executemany("INSERT INTO chunks (input, source, byte_start, byte_end, text) VALUES (?, ?, ?, ?, ?)", rows)
+
+            if chunks_path and os.path.exists(chunks_path):
+                seen.add(str(chunks_path))
+                self._sync_jsonl("chunks", str(chunks_path), insert_chunks, stats)
+
+            seed_path = os.path.abspath(seed_path) if seed_path else None
+            qa_paths = [os.path.abspath(p) for p in qa_paths if os.path.exists(p)]
+            qa_paths.sort(key=lambda p: p != seed_path)
+            seed_labels = {}
+
+            def insert_qa(path, start_row, records):
+                rows = []
+                for i, r in enumerate(records, start_row):
+                    labels = qa_labels(r.get("question", ""), r.get("answer", ""))
+                    if not any(labels) and seed_path in qa_paths and path != seed_path and isinstance(r.get("seed_id"), int):
+                        if not seed_labels:
+                            seed_labels.update((line, tuple(labels)) for line, *labels in self.db.execute(
+                                "SELECT line, theme, hypothesis, theory FROM qa WHERE input = ?", (seed_path,)))
+                        labels = seed_labels.get(r["seed_id"], labels)
+                    rows.append((path, i, r.get("question"), r.get("answer"), r.get("source"), *labels))
+                self.db.executemany("INSERT INTO qa (input, line, question, answer, source, theme, hypothesis, theory) "
+                                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+            for path in qa_paths:
+                seen.add(path)
+                self._sync_jsonl("qa", path, insert_qa, stats)
+
+            # Inputs that disappeared or are no longer configured
+            for table, kind in (("documents", "documents"), ("chunks", "chunks"), ("qa", "qa")):
+                for (path,) in self.db.execute(f"SELECT DISTINCT input FROM {table}").fetchall():
+                    if path not in seen:
+                        self._drop(kind, path)
+        return stats
+
+    # Queries
+
+    def facets(self):
+        """Distinct values of each filter column, for populating filter widgets."""
+        sources = set()
+        for table in ("qa", "chunks", "documents"):
+            sources.update(r[0] for r in self.db.execute(f"SELECT DISTINCT source FROM {table} WHERE source IS NOT NULL"))
+        values = {"source": sorted(sources)}
+        for column in ("theme", "hypothesis", "theory"):
+            values[column] = [r[0] for r in self.db.execute(
+                f"SELECT DISTINCT {column} FROM qa WHERE {column} IS NOT NULL ORDER BY 1")]
+        return values
+
+    def search(self, kind, query="", filters=None, page=0, page_size=PAGE_SIZE):
+        """(total matches, column names, rows of the requested page, whether ranked by relevance).
+
+        Text queries rank by bm25 when they match at most RANK_LIMIT rows; broader
+        ones, and filter-only queries, page through rows in dataset order.
+        """
+        spec = KINDS[kind]
+        table = spec["table"]
+        where, params = [], []
+        for column, value in (filters or {}).items():
+            if column not in spec["filters"]:
+                raise ValueError(f"{kind} cannot be filtered on {column!r}")
+            if value is not None:
+                where.append(f"{table}.{column} = ?")
+                params.append(value)
+
+        match = fts_query(query or "")
+        columns = list(spec["columns"])
+        select = [f"{table}.{c}" for c in columns]
+        if match:
+            if spec["snippet"]:
+                index = spec["fts"].index(spec["snippet"])
+                select[columns.index(spec["snippet"])] = f"snippet({table}_fts, {index}, '[', ']', '…', {SNIPPET_TOKENS})"
+            # CROSS JOIN keeps the FTS index as the outer loop rather than a filter column's index
+            source = f"{table}_fts CROSS JOIN {table} ON {table}.id = {table}_fts.rowid"
+            where.insert(0, f"{table}_fts MATCH ?")
+            params.insert(0, match)
+        else:
+            if spec["snippet"]:
+                select[columns.index(spec["snippet"])] = f"substr({table}.{spec['snippet']}, 1, 400)"
+            source = table
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+
+        if match and len(where) == 1:
+            # Nothing to join for: count in the FTS index alone
+            total = self.db.execute(f"SELECT COUNT(*) FROM {table}_fts WHERE {table}_fts MATCH ?", params).fetchone()[0]
+        else:
+            total = self.db.execute(f"SELECT COUNT(*) FROM {source}{clause}", params).fetchone()[0]
+        ranked = bool(match) and total <= RANK_LIMIT
+        if ranked:
+            order = f"{table}_fts.rank"
+        else:
+            # FTS5 returns matches in rowid order, so this needs no sort
+            order = f"{table}_fts.rowid" if match else f"{table}.id"
+        rows = self.db.execute(
+            f"SELECT {', '.join(select)} FROM {source}{clause} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [page_size, page * page_size],
+        ).fetchall()
+        return total, columns, rows, ranked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the research database.")
+    parser.add_argument("--db", default=str(DEFAULT_DB))
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index new or changed inputs")
+    build.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="directory written by processing/ingest.py")
+    build.add_argument("--chunks", default=str(DEFAULT_CHUNKS), help="JSONL written by processing/chunker.py")
+    build.add_argument("--qa", nargs="+", default=[str(p) for p in DEFAULT_QA], help="Q&A JSONL files")
+    build.add_argument("--seed", default=str(DEFAULT_SEED), help="dataset amplify.py read; amplified rows take labels from it")
+    search = sub.add_parser("search", help="full-text search with filters")
+    search.add_argument("query", nargs="?", default="")
+    search.add_argument("--kind", choices=KINDS, default="qa")
+    for column in ("source", "theme", "hypothesis", "theory"):
+        search.add_argument(f"--{column}", default=None)
+    search.add_argument("--page", type=int, default=0)
+    search.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    store = ResearchStore(args.db)
+    try:
+        if args.command == "build":
+            stats = store.sync(args.corpus, args.chunks, args.qa, args.seed)
+            print(f"Indexed {stats['documents']} documents, {stats['chunks']} chunks and {stats['qa']} Q&A pairs.")
+            return
+        filters = {c: getattr(args, c) for c in KINDS[args.kind]["filters"] if getattr(args, c) is not None}
+        total, columns, rows, ranked = store.search(args.kind, args.query, filters, args.page, args.page_size)
+        print(f"{total} matches" + (", by relevance" if ranked else ""))
+        for row in rows:
+            print(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Time-stepped PILAR agent simulation.
+
+    python simulation.py --agents 100000 --steps 1000 --hierarchy 0.6 --aversion 0.2
+
+Every agent holds the five pillars on the assessment's 1-10 scale, stored as
+one (n_agents, 5) float32 array. Each step an agent's pillars relax towards a
+target made of:
+
+- the 20 PILAR forces (14 positive, 6 negative) acting between its own pillars
+  through the FORCES coupling matrix;
+- hierarchy: a steeper hierarchy lifts prospects but lowers involvement,
+  liking, agency and respect, and gives high-status agents more prospects and
+  agency than low-status ones;
+- inequality aversion: agents above the group's mean viability give up
+  prospects and agency (levelling), aversion raises liking, involvement and
+  respect, and the spread in viability erodes liking and respect in groups that
+  tolerate it;
+
+plus noise. Only per-step summaries and the final state are kept.
+"""
+
+import argparse
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+PILLARS = ("prospects", "involved", "liked", "agency", "respect")
+
+# FORCES[i, j] is the pull pillar i exerts on pillar j. The negatives:
+# prospects -> involved and -> agency (loafing and the success paradox),
+# involved -> agency and liked -> agency (conformity), agency -> involved and
+# -> liked (pushing for change strains the group).
+FORCES = np.array([
+    #   P     I     L     A     R
+    [0.00, -0.15, 0.20, -0.25, 0.15],   # prospects
+    [0.25, 0.00, 0.30, -0.10, 0.20],    # involved
+    [0.15, 0.30, 0.00, -0.15, 0.15],    # liked
+    [0.30, -0.10, -0.15, 0.00, 0.20],   # agency
+    [0.20, 0.30, 0.20, 0.25, 0.00],     # respect
+], dtype=np.float32)
+
+MID = 5.5
+INITIAL_SD = 1.5
+# Shift of every agent's targets per unit of hierarchy, and the extra shift per unit of status
+HIERARCHY_LEVEL = np.array([1.0, -2.0, -1.0, -3.0, -1.5], dtype=np.float32)
+HIERARCHY_STATUS = np.array([2.0, 0.0, 0.0, 4.0, 0.0], dtype=np.float32)
+AVERSION_LEVEL = np.array([0.0, 1.0, 1.0, 0.0, 2.0], dtype=np.float32)
+# Levelling of above-mean agents and the cost of viability spread, per unit of aversion / tolerance
+LEVELLING = np.array([0.5, 0.0, 0.0, 0.5, 0.0], dtype=np.float32)
+ENVY = np.array([0.0, 0.0, 1.0, 0.0, 1.5], dtype=np.float32)
+HIGH_VIABILITY, LOW_VIABILITY = 7.0, 5.0
+
+
+class SimulationResult(NamedTuple):
+    """Per-step summaries (row 0 is the initial state) and the final (n_agents, 5) state."""
+
+    mean: np.ndarray            # (steps + 1, 5) pillar means
+    std: np.ndarray             # (steps + 1, 5) pillar standard deviations
+    viability: np.ndarray       # (steps + 1,) mean viability
+    viability_sd: np.ndarray    # (steps + 1,)
+    high: np.ndarray            # (steps + 1,) share of agents with viability >= 7
+    low: np.ndarray             # (steps + 1,) share of agents with viability < 5
+    final: np.ndarray
+
+
+def simulate(n_agents, steps=200, hierarchy=0.3, inequality_aversion=0.7, seed=42,
+             forces=FORCES, rate=0.1, noise=0.3):
+    """Advance `n_agents` agents `steps` steps and summarize every step.
+
+    `seed` is an int or a `np.random.SeedSequence`; the initial state, the
+    status ranks and the step noise each draw from their own spawned stream, so
+    changing `steps` leaves the starting population unchanged.
+    """
+    n = int(n_agents)
+    if n < 1:
+        raise ValueError(f"n_agents must be at least 1, got {n_agents}")
+    seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    init_seq, rank_seq, noise_seq = seed_seq.spawn(3)
+    rng = np.random.default_rng(noise_seq)
+    forces = np.asarray(forces, dtype=np.float32)
+    eye = np.eye(5, dtype=np.float32)
+    a = np.float32(inequality_aversion)
+
+    state = np.random.default_rng(init_seq).normal(MID, INITIAL_SD, (n, 5)).astype(np.float32)
+    np.clip(state, 1, 10, out=state)
+    status = np.random.default_rng(rank_seq).random(n, dtype=np.float32) - 0.5
+
+    # The update  S += rate * (MID + bias + (S - MID) @ F - S - a * LEVELLING * (v - mean v)
+    #                          - (1 - a) * ENVY * sd v) + noise,  with v = S @ 1/5,
+    # is linear in S apart from the two group statistics, so it folds into one
+    # (5, 5) matmul, a fixed per-agent offset and a per-step row.
+    transition = eye + rate * (forces - eye - a * np.outer(np.full(5, 0.2, np.float32), LEVELLING))
+    offset = rate * (MID - MID * forces.sum(axis=0) + hierarchy * HIERARCHY_LEVEL + a * AVERSION_LEVEL
+                     + np.outer(status * hierarchy, HIERARCHY_STATUS))
+    # Step noise is uniform with standard deviation `noise`: its sum over many
+    # steps is Gaussian anyway, and uniform draws cost a fifth of normal ones.
+    # Centring the draws is folded into the offset.
+    spread = np.float32(noise * np.sqrt(12))
+    offset = (offset - spread / 2).astype(np.float32)
+    weights = np.full(5, 0.2, dtype=np.float32)
+    ones = np.ones(n, dtype=np.float32)
+
+    mean = np.empty((steps + 1, 5), dtype=np.float32)
+    std = np.empty((steps + 1, 5), dtype=np.float32)
+    viability = np.empty(steps + 1, dtype=np.float32)
+    viability_sd = np.empty(steps + 1, dtype=np.float32)
+    high = np.empty(steps + 1, dtype=np.float32)
+    low = np.empty(steps + 1, dtype=np.float32)
+    v = np.empty(n, dtype=np.float32)
+    buffer = np.empty_like(state)
+    jitter = np.empty_like(state)
+
+    def summarize(t):
+        np.matmul(state, weights, out=v)
+        mean[t] = ones @ state / n
+        std[t] = np.sqrt(np.maximum(np.einsum("ij,ij->j", state, state) / n - mean[t] ** 2, 0))
+        viability[t] = mean[t].mean()
+        viability_sd[t] = np.sqrt(max(float(v @ v) / n - float(viability[t]) ** 2, 0.0))
+        high[t] = np.count_nonzero(v >= HIGH_VIABILITY) / n
+        low[t] = np.count_nonzero(v < LOW_VIABILITY) / n
+
+    summarize(0)
+    for t in range(1, steps + 1):
+        row = rate * (a * viability[t - 1] * LEVELLING - (1 - a) * viability_sd[t - 1] * ENVY)
+        np.matmul(state, transition, out=buffer)
+        buffer += offset
+        buffer += row.astype(np.float32)
+        rng.random(dtype=np.float32, out=jitter)
+        jitter *= spread
+        buffer += jitter
+        np.clip(buffer, 1, 10, out=buffer)
+        state, buffer = buffer, state
+        summarize(t)
+
+    return SimulationResult(mean, std, viability, viability_sd, high, low, state)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the PILAR agent simulation and print its summary.")
+    parser.add_argument("--agents", type=int, default=100_000)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--hierarchy", type=float, default=0.3)
+    parser.add_argument("--aversion", type=float, default=0.7, help="inequality aversion, 0-1")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", default=None, help="save the per-step summaries to this .npz file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = simulate(args.agents, args.steps, args.hierarchy, args.aversion, args.seed)
+    seconds = time.perf_counter() - start
+    print(f"{args.agents} agents x {args.steps} steps in {seconds:.2f}s")
+    for name, value, sd in zip(PILLARS, result.mean[-1], result.std[-1]):
+        print(f"{name:>10}  {value:5.2f} ± {sd:4.2f}")
+    print(f"{'viability':>10}  {result.viability[-1]:5.2f} ± {result.viability_sd[-1]:4.2f}"
+          f"  (high {result.high[-1]:.1%}, low {result.low[-1]:.1%})")
+    if args.output:
+        np.savez_compressed(args.output, **{k: v for k, v in result._asdict().items() if k != "final"})
+
+
+if __name__ == "__main__":
+    main()
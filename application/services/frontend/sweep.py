@@ -0,0 +1,157 @@
+"""Parameter sweeps of the PILAR simulation over hierarchy x inequality aversion x agents.
+
+    python sweep.py --grid 50 --agents 1000 --steps 200 -o sweep.csv
+
+Each grid cell runs on a process pool with a seed derived from its own
+parameters, so a cell's result does not depend on the rest of the grid. Workers
+are spawned rather than forked, which is safe from the multithreaded Streamlit
+server. Finished cells are appended to a JSONL cache keyed by parameters, seed and the
+simulation code; growing or refining a grid only runs the new cells.
+`iter_sweep` yields cells as they finish, cached ones first, so callers can
+draw partial heatmaps while the rest runs.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from simulation import PILLARS, simulate
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_CACHE = HERE / ".cache" / "sweep.jsonl"
+# Steady-state figures average the last tenth of the steps
+TAIL = 0.1
+# Pool size for sweeps started from the app: leave the Streamlit server a core
+SERVER_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+
+
+def levels(points):
+    """`points` evenly spaced levels in [0, 1], rounded so refined grids share cells with coarser ones."""
+    return [round(float(x), 6) for x in np.linspace(0.0, 1.0, points)]
+
+
+def grid(points, agents):
+    """Every (hierarchy, aversion, n_agents) cell of a `points` x `points` grid per agent count."""
+    return [(h, a, int(n)) for n in agents for h in levels(points) for a in levels(points)]
+
+
+def code_fingerprint():
+    with open(HERE / "simulation.py", "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+
+def cell_key(cell, steps, seed, fingerprint):
+    return hashlib.blake2b(json.dumps([cell, steps, seed, fingerprint]).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cell_seed(cell, seed):
+    """Seed from the cell's own parameters, not its position in the grid."""
+    hierarchy, aversion, agents = cell
+    return np.random.SeedSequence([seed, agents, round(hierarchy * 1e6), round(aversion * 1e6)])
+
+
+def run_cell(cell, steps, seed):
+    hierarchy, aversion, agents = cell
+    result = simulate(agents, steps, hierarchy, aversion, seed=cell_seed(cell, seed))
+    tail = max(1, int(len(result.viability) * TAIL))
+    return {
+        "hierarchy": hierarchy, "aversion": aversion, "agents": agents, "steps": steps, "seed": seed,
+        "viability": round(float(result.viability[-tail:].mean()), 6),
+        "viability_sd": round(float(result.viability_sd[-tail:].mean()), 6),
+        "high": round(float(result.high[-tail:].mean()), 6),
+        "low": round(float(result.low[-tail:].mean()), 6),
+        **{pillar: round(float(value), 6) for pillar, value in zip(PILLARS, result.mean[-tail:].mean(axis=0))},
+    }
+
+
+def load_cache(path):
+    cached = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # half-written line from an interrupted sweep
+                cached[record["key"]] = record
+    return cached
+
+
+def iter_sweep(cells, steps=200, seed=42, workers=None, cache_path=DEFAULT_CACHE):
+    """Yield a summary dict per cell, cached cells first, the rest as the pool finishes them."""
+    fingerprint = code_fingerprint()
+    cached = load_cache(cache_path)
+    todo = []
+    for cell in dict.fromkeys(cells):
+        key = cell_key(cell, steps, seed, fingerprint)
+        if key in cached:
+            yield cached[key]
+        else:
+            todo.append((key, cell))
+    if not todo:
+        return
+
+    Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+    # Forking a process with other threads running can copy their held locks into the workers
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        with open(cache_path, "a", encoding="utf-8") as out:
+            futures = {pool.submit(run_cell, cell, steps, seed): key for key, cell in todo}
+            for future in as_completed(futures):
+                record = {"key": futures[future], **future.result()}
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                yield record
+    finally:
+        # A caller that stops early (e.g. a Streamlit rerun) should not wait for the queued cells
+        pool.shutdown(cancel_futures=True)
+
+
+def viability_grid(records, axis, agents):
+    """Hierarchy x aversion matrix of mean viability over `axis` levels for one agent count; NaN where not yet run."""
+    index = {level: i for i, level in enumerate(axis)}
+    values = np.full((len(axis), len(axis)), np.nan)
+    for r in records:
+        if r["agents"] == agents and r["hierarchy"] in index and r["aversion"] in index:
+            values[index[r["hierarchy"]], index[r["aversion"]]] = r["viability"]
+    return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the PILAR simulation over hierarchy, inequality aversion and group size.")
+    parser.add_argument("--grid", type=int, default=50, help="levels per axis, evenly spaced in [0, 1]")
+    parser.add_argument("--agents", type=int, nargs="+", default=[1000])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE))
+    parser.add_argument("-o", "--output", default=None, help="write all cells to this CSV")
+    args = parser.parse_args(argv)
+
+    cells = grid(args.grid, args.agents)
+    start = time.perf_counter()
+    records = []
+    for record in iter_sweep(cells, args.steps, args.seed, args.workers, args.cache):
+        records.append(record)
+        if len(records) % max(1, len(cells) // 10) == 0:
+            print(f"{len(records)}/{len(cells)} cells, {time.perf_counter() - start:.1f}s")
+    print(f"Swept {len(cells)} cells in {time.perf_counter() - start:.1f}s.")
+
+    if args.output:
+        columns = ["hierarchy", "aversion", "agents", "steps", "seed", "viability", "viability_sd", "high", "low", *PILLARS]
+        records.sort(key=lambda r: (r["agents"], r["hierarchy"], r["aversion"]))
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(",".join(columns) + "\n")
+            for r in records:
+                f.write(",".join(str(r[c]) for c in columns) + "\n")
+
+
+if __name__ == "__main__":
+    main()
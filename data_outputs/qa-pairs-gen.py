@@ -148,17 +148,18 @@ maintaining traceability to source materials and temporal context.
 
 Usage
 -----
-    python qa-pairs-gen.py
+    python qa-pairs-gen.py [--rows N] [--output PATH] [--flush-every N]
 
-The script will generate 'synthetic_qa_phi4.jsonl' in the current directory,
-containing the specified number of Q&A pairs ready for SDG amplification and
-subsequent LLM fine-tuning.
+The script will generate 'synthetic_qa_phi4.jsonl' (or PATH) in the current
+directory, containing N Q&A pairs (default 500) ready for SDG amplification and
+subsequent LLM fine-tuning. Pairs are streamed one at a time from
+`iter_qa_pairs()` through a buffered writer, so peak memory stays flat as N
+grows; `generate_qa_pairs()` still returns the full list for small runs.
 
 Dependencies
 ------------
 - json: Standard library for JSONL serialization
-- uuid: Standard library for unique identifier generation (imported but not used)
-- datetime: Standard library for timestamp generation
+- argparse: Standard library for the command-line interface
 
 Notes
 -----
@@ -170,9 +171,8 @@ Notes
 provided by papers for amplification/expansion
 """
 
+import argparse
 import json
-import uuid
-from datetime import datetime
 
 # Style and Core Opinions of Author
 extracted_style = []
@@ -188,13 +188,23 @@ abstraction = ["Strategic: Vision-level", "Operational: Project-Level", "Tactica
 """A List of core themes for the data that is being generated"""
 
 core_themes = [
-    
+    "PILAR model (Prospects, Involved, Liked, Agency, Respect)",
+    "Prosocial evolution and sub-group level selection (sGLS)",
+    "Inequality aversion in collaboration",
+    "Thorngate’s Postulate of Commensurate Complexity",
+    "Deep Research Agent (DRA) for practical application",
+    "Egalitarian behavior and cultural transformation",
+    "Positive-sum vs. zero-sum dynamics"
 ]
 
 """A list of Hypothesese the dataset is aiming to validate"""
 
 hypotheses = [
-    
+    "Teaching PILAR/EUCRM increases prosocial orientation and group viability, mediated by pillar awareness, especially in low-empathy individuals.",
+    "High inequality aversion predicts elevated Respect/Involved perceptions and prosocial engagement, moderating zero-sum avoidance.",
+    "Egalitarian structures boost liking/respect/communication but reduce agency/confidence, affecting adaptability in resource-scarce ecologies.",
+    "Low prosociality (low QoL/EQ) causes reticence in prosocial learning, requiring ancestral norm priming for engagement.",
+    "Hierarchy steepness balances confidence/performance vs. trio (health), optimal in actualization hierarchies."
 ]
 theories = [
     # Psychology and Pro Social Example Given
@@ -211,16 +221,60 @@ sources = [
     "abstract.md", "A-Model-Of-Collaboration.pdf"
 ]
 
-# Function to generate Q&A pairs with authors' style
-def generate_qa_pairs():
-    # Generated Pairs
-    qa_pairs = []
-    timestamp = "2025-10-20T12:13:00Z"  # 11:13 PM ACDT = 12:13 PM UTC
-
-    # Set Range of Q&A Pairs
-    for i in range(500):
-        # Generate unique question ID and base structure
-        q_id = f"Q{i+1}"
+# Question templates with scholarly tone and hypothesis focus
+question_types = [
+    "How might {theme} enhance collaboration viability in light of {hypo}?",
+    "What role does {theory} play in validating {hypo} within {theme}?",
+    "Can {theme} address the challenge posed by {hypo}, drawing on {theory}?",
+    "To what extent does {hypo} influence the efficacy of {theme}, per {theory}?"
+]
+
+# Answer fragments with authors' optimistic yet cautious style, keyed by core theme
+answer_base = {
+    "PILAR model (Prospects, Involved, Liked, Agency, Respect)": "The PILAR model, with its five pillars and 20 interlinked forces, offers a promising synthesis of over 30 SGP theories, potentially enhancing collaboration viability if applied through idealized conditions.",
+    "Prosocial evolution and sub-group level selection (sGLS)": "Prosocial evolution, driven by sGLS, suggests an exponential advantage in hominin collaboration, rooted in savannah ecology, though empirical validation remains a future endeavor.",
+    "Inequality aversion in collaboration": "Inequality aversion, a cornerstone of prosociality, punishes unfairness and fosters Respect, yet its impact may wane in hierarchical settings unless mitigated by DRA.",
+    "Thorngate’s Postulate of Commensurate Complexity": "Thorngate’s Postulate highlights the trade-off between generality, accuracy, and simplicity in PILAR, necessitating AI agents like DRA to bridge this complexity gap.",
+    "Deep Research Agent (DRA) for practical application": "The DRA, powered by LLMs, acts as an empathetic coach, translating PILAR’s complexity into actionable guidance, though its efficacy hinges on bias mitigation.",
+    "Egalitarian behavior and cultural transformation": "Egalitarian behavior stabilizes groups via the communication-respect-liking trio, yet may stifle Agency, a tension we believe can be balanced with careful design.",
+    "Positive-sum vs. zero-sum dynamics": "Positive-sum dynamics build CA through trust, countering zero-sum reticence, a challenge we see as addressable with ancestral norm priming."
+}
+theory_insight = {
+    "Social Identity Theory (SIT)": "SIT underscores how Liked perceptions shape ingroup cohesion, aligning with PILAR’s evolutionary adaptive mechanisms.",
+    "Social Network Analysis (SNA)": "SNA reveals network centrality’s role in Involved perceptions, supporting PILAR’s force dynamics.",
+    "Psychological Safety": "Psychological safety fosters Agency, a pillar we deem critical for innovation within PILAR.",
+    "Field Theory (Lewin)": "Lewin’s field theory informs Prospects as a function of social forces, a concept we integrate into PILAR’s structure.",
+    "Cognitive Dissonance (Festinger)": "Festinger’s dissonance explains Agency’s impact on Liked, a nuance we explore for collaboration resistance.",
+    "Inequity Aversion (de Waal)": "de Waal’s inequity aversion links to Respect, reinforcing PILAR’s prosocial foundation."
+}
+
+TIMESTAMP = "2025-10-20T12:13:00Z"  # 11:13 PM ACDT = 12:13 PM UTC
+DEFAULT_ROWS = 500
+DEFAULT_OUTPUT = "synthetic_qa_phi4.jsonl"
+
+
+def build_tables():
+    """Render every answer once per (theme, theory) so the row loop only does lookups."""
+    if not core_themes or not hypotheses:
+        raise ValueError("core_themes and hypotheses must be populated before generating Q&A pairs")
+    missing = [theme for theme in core_themes if theme not in answer_base]
+    if missing:
+        raise ValueError(f"answer_base has no entry for core theme(s): {', '.join(missing)}")
+    return {
+        (theme, theory): f"{answer_base[theme]} We contend that {theory_insight[theory]} offers a robust lens, though further empirical testing is prudent to affirm these insights."
+        for theme in core_themes
+        for theory in theories
+    }
+
+
+# Stream Q&A pairs with authors' style, one record at a time
+def iter_qa_pairs(n_pairs=DEFAULT_ROWS):
+    """Build the answer table up front, so bad inputs fail before any output file is opened."""
+    return _iter_rows(n_pairs, build_tables())
+
+
+def _iter_rows(n_pairs, answers):
+    for i in range(n_pairs):
         # Cycle through configuration lists
         # style = extracted_style[i % len(extracted_style)] if extracted_style else None
         # topic = topic_level[i % len(topic_level)] if topic_level else None
@@ -230,48 +284,44 @@ def generate_qa_pairs():
         theory = theories[i % len(theories)]
         source = sources[i % len(sources)]
 
-        # Construct question with scholarly tone and hypothesis focus
-        question_types = [
-            f"How might {theme} enhance collaboration viability in light of {hypo}?",
-            f"What role does {theory} play in validating {hypo} within {theme}?",
-            f"Can {theme} address the challenge posed by {hypo}, drawing on {theory}?",
-            f"To what extent does {hypo} influence the efficacy of {theme}, per {theory}?"
-        ]
-        question = f"{q_id}: {question_types[i % len(question_types)]}"
-
-        # Construct answer with authors' optimistic yet cautious style
-        answer_base = {
-            "PILAR model": "The PILAR model, with its five pillars and 20 interlinked forces, offers a promising synthesis of over 30 SGP theories, potentially enhancing collaboration viability if applied through idealized conditions.",
-            "Prosocial evolution and sGLS": "Prosocial evolution, driven by sGLS, suggests an exponential advantage in hominin collaboration, rooted in savannah ecology, though empirical validation remains a future endeavor.",
-            "Inequality aversion in collaboration": "Inequality aversion, a cornerstone of prosociality, punishes unfairness and fosters Respect, yet its impact may wane in hierarchical settings unless mitigated by DRA.",
-            "Thorngate’s Postulate": "Thorngate’s Postulate highlights the trade-off between generality, accuracy, and simplicity in PILAR, necessitating AI agents like DRA to bridge this complexity gap.",
-            "Deep Research Agent (DRA)": "The DRA, powered by LLMs, acts as an empathetic coach, translating PILAR’s complexity into actionable guidance, though its efficacy hinges on bias mitigation.",
-            "Egalitarian behavior and cultural transformation": "Egalitarian behavior stabilizes groups via the communication-respect-liking trio, yet may stifle Agency, a tension we believe can be balanced with careful design.",
-            "Positive-sum vs. zero-sum dynamics": "Positive-sum dynamics build CA through trust, countering zero-sum reticence, a challenge we see as addressable with ancestral norm priming."
-        }
-        theory_insight = {
-            "Social Identity Theory (SIT)": "SIT underscores how Liked perceptions shape ingroup cohesion, aligning with PILAR’s evolutionary adaptive mechanisms.",
-            "Social Network Analysis (SNA)": "SNA reveals network centrality’s role in Involved perceptions, supporting PILAR’s force dynamics.",
-            "Psychological Safety": "Psychological safety fosters Agency, a pillar we deem critical for innovation within PILAR.",
-            "Field Theory (Lewin)": "Lewin’s field theory informs Prospects as a function of social forces, a concept we integrate into PILAR’s structure.",
-            "Cognitive Dissonance (Festinger)": "Festinger’s dissonance explains Agency’s impact on Liked, a nuance we explore for collaboration resistance.",
-            "Inequity Aversion (de Waal)": "de Waal’s inequity aversion links to Respect, reinforcing PILAR’s prosocial foundation."
-        }
-        answer = f"{answer_base[theme]} We contend that {theory_insight[theory]} offers a robust lens, though further empirical testing is prudent to affirm these insights."
+        question = question_types[i % len(question_types)].format(theme=theme, hypo=hypo, theory=theory)
 
-        qa_pairs.append({
-            "question": question,
-            "answer": answer,
+        yield {
+            "question": f"Q{i+1}: {question}",
+            "answer": answers[theme, theory],
             "source": source,
-            "timestamp": timestamp
-        })
+            "timestamp": TIMESTAMP
+        }
+
+
+# Function to generate Q&A pairs with authors' style
+def generate_qa_pairs(n_pairs=DEFAULT_ROWS):
+    return list(iter_qa_pairs(n_pairs))
+
+
+def write_jsonl(records, path, flush_every=10_000, buffer_size=1 << 20):
+    """Write records to a JSONL file through a large write buffer, flushing every `flush_every` rows."""
+    count = 0
+    with open(path, "w", encoding="utf-8", buffering=buffer_size) as f:
+        for item in records:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            count += 1
+            if count % flush_every == 0:
+                f.flush()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic PILAR/EUCRM Q&A seed pairs as JSONL.")
+    parser.add_argument("-n", "--rows", type=int, default=DEFAULT_ROWS, help="number of Q&A pairs to generate")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="output JSONL path")
+    parser.add_argument("--flush-every", type=int, default=10_000, help="flush the output file every N rows")
+    args = parser.parse_args(argv)
 
-    return qa_pairs
+    # Generate and stream to .jsonl file
+    count = write_jsonl(iter_qa_pairs(args.rows), args.output, flush_every=args.flush_every)
+    print(f"File '{args.output}' has been created with {count} Q&A pairs.")
 
-# Generate and write to .jsonl file
-qa_data = generate_qa_pairs()
-with open("synthetic_qa_phi4.jsonl", "w", encoding="utf-8") as f:
-    for item in qa_data:
-        f.write(json.dumps(item, ensure_ascii=False) + "\n")
 
-print("File 'synthetic_qa_phi4.jsonl' has been created with 3000 Q&A pairs.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+from fingerprints import read_index, row_fingerprint, sidecar_path
+
+# Prompt for expanding a seed pair into variations that keep the seed's criteria
+SEED_PROMPT = """You are expanding a research Q&A dataset on prosocial collaboration and the PILAR model (Prospects, Involved, Liked, Agency, Respect).
+Write {n} new question-and-answer pairs that vary the phrasing and angle of the seed below while keeping its hypothesis, theory and theme.
+Keep the authors' scholarly yet accessible tone and cautious optimism, and keep answers grounded in the same claims.
+
+Seed question: {question}
+Seed answer: {answer}
+
+Respond with only a JSON array of objects with "question" and "answer" keys.
+"""
+
+# Prompt for generating pairs from a chunk of source text
+CHUNK_PROMPT = """You are building a research Q&A dataset on prosocial collaboration and the PILAR model (Prospects, Involved, Liked, Agency, Respect).
+Write {n} question-and-answer pairs answerable from the passage below, in a scholarly yet accessible tone.
+
+Passage:
+{text}
+
+Respond with only a JSON array of objects with "question" and "answer" keys.
+"""
+
+RETRY_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+def build_prompt(item, n):
+    if "text" in item:
+        return CHUNK_PROMPT.format(n=n, text=item["text"])
+    return SEED_PROMPT.format(n=n, question=item["question"], answer=item["answer"])
+
+
+def parse_pairs(text):
+    """Pull the JSON array of {"question", "answer"} objects out of a completion, ignoring malformed entries."""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return []
+    try:
+        pairs = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return []
+    return [
+        {"question": p["question"].strip(), "answer": p["answer"].strip()}
+        for p in pairs
+        if isinstance(p, dict) and isinstance(p.get("question"), str) and isinstance(p.get("answer"), str)
+    ]
+
+
+def load_done(done_path):
+    if not os.path.exists(done_path):
+        return set()
+    with open(done_path, encoding="utf-8") as f:
+        return {int(line) for line in f if line.strip().isdigit()}
+
+
+def truncate_partial_line(path):
+    """Drop a trailing half-written line left by an interrupted run."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        position = size
+        while position > 0:
+            step = min(1 << 16, position)
+            f.seek(position - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != size:
+            f.truncate(position)
+
+
+def drop_unfinished_rows(output_path, completed):
+    """Drop output rows whose seed id never reached the checkpoint.
+
+    A run killed after a batch's rows were synced but before its ids were
+    checkpointed leaves rows that the next run would generate again.
+    """
+    if not os.path.exists(output_path):
+        return 0
+    tmp = output_path + ".tmp"
+    dropped = 0
+    with open(output_path, encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dst:
+        for line in src:
+            if line.strip() and json.loads(line).get("seed_id") not in completed:
+                dropped += 1
+                continue
+            dst.write(line)
+    if dropped:
+        os.replace(tmp, output_path)
+    else:
+        os.remove(tmp)
+    return dropped
+
+
+def prune_seeds(output_path, done_path, stale):
+    """Drop amplified rows and checkpoint entries for seeds whose inputs changed."""
+    tmp = output_path + ".tmp"
+    with open(output_path, encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dst:
+        for line in src:
+            if line.strip() and json.loads(line).get("seed_id") in stale:
+                continue
+            dst.write(line)
+    os.replace(tmp, output_path)
+
+    with open(done_path, encoding="utf-8") as f:
+        kept = [line for line in f if line.strip().isdigit() and int(line) not in stale]
+    with open(done_path, "w", encoding="utf-8") as f:
+        f.writelines(kept)
+
+
+def invalidate_changed_seeds(input_path, output_path, completed):
+    """Compare the seed file's fingerprint sidecar with the one recorded at the last run.
+
+    Completed seeds whose fingerprint differs are pruned so only they get
+    re-amplified. The current sidecar is then recorded as `<output>.seedfp`:
+    after pruning, every checkpointed seed was amplified from these inputs.
+    """
+    current = read_index(sidecar_path(input_path))
+    if current is None:
+        return set()
+    recorded = read_index(output_path + ".seedfp")
+    stale = set()
+    if recorded is not None:
+        stale = {seed_id for seed_id in completed if row_fingerprint(recorded, seed_id) != row_fingerprint(current, seed_id)}
+    if stale:
+        prune_seeds(output_path, output_path + ".done", stale)
+        completed -= stale
+    with open(output_path + ".seedfp", "wb") as f:
+        f.write(current)
+    return stale
+
+
+def iter_items(path, done, limit=None):
+    with open(path, encoding="utf-8") as f:
+        for seed_id, line in enumerate(f):
+            if limit is not None and seed_id >= limit:
+                break
+            if seed_id in done or not line.strip():
+                continue
+            yield seed_id, json.loads(line)
+
+
+class Amplifier:
+    """Sends seed pairs or text chunks to an OpenAI-compatible /completions endpoint.
+
+    Items are grouped into batches that go out as a single request with a list of
+    prompts, at most `concurrency` requests are in flight, and failed requests are
+    retried with jittered exponential backoff. Results are appended to the output
+    JSONL and the seed ids of each finished batch to `<output>.done`, so a rerun
+    skips everything already completed and drops rows of batches that never
+    reached the checkpoint. A response with fewer choices than prompts fails
+    its batch. When the seed file has a fingerprint
+    sidecar (written by qa.py), seeds whose inputs changed are re-amplified.
+    """
+
+    def __init__(self, base_url, model, concurrency=8, batch_size=8, variants=5, max_tokens=512,
+                 temperature=0.7, top_p=0.95, retries=5, backoff=1.0, timeout=300):
+        self.url = base_url.rstrip("/") + "/completions"
+        self.model = model
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.variants = variants
+        self.params = {"max_tokens": max_tokens, "temperature": temperature, "top_p": top_p}
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.stats = {"batches": 0, "items": 0, "pairs": 0, "empty": 0, "retries": 0, "failed": 0}
+
+    async def complete(self, session, prompts):
+        payload = {"model": self.model, "prompt": prompts, **self.params}
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.post(self.url, json=payload) as response:
+                    if response.status in RETRY_STATUS:
+                        raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+                    response.raise_for_status()
+                    body = await response.json()
+                choices = sorted(body["choices"], key=lambda c: c.get("index", 0))
+                if len(choices) != len(prompts):
+                    # zip() would silently pair the wrong texts with seeds, or drop seeds
+                    raise ValueError(f"expected {len(prompts)} choices, got {len(choices)}")
+                return [c.get("text", "") for c in choices]
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                if isinstance(exc, aiohttp.ClientResponseError) and exc.status not in RETRY_STATUS:
+                    raise
+                if attempt == self.retries:
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+
+    async def worker(self, session, queue, out, done):
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                queue.task_done()
+                return
+            try:
+                texts = await self.complete(session, [build_prompt(item, self.variants) for _, item in batch])
+            except Exception as exc:
+                # Leave the batch out of the checkpoint so the next run retries it
+                self.stats["failed"] += len(batch)
+                print(f"Batch starting at seed {batch[0][0]} failed: {exc}")
+                queue.task_done()
+                continue
+
+            lines = []
+            for (seed_id, item), text in zip(batch, texts):
+                pairs = parse_pairs(text)
+                if not pairs:
+                    self.stats["empty"] += 1
+                for variant, pair in enumerate(pairs):
+                    lines.append(json.dumps({
+                        **pair,
+                        "source": item.get("source", ""),
+                        "timestamp": item.get("timestamp", ""),
+                        "seed_id": seed_id,
+                        "variant": variant,
+                    }, ensure_ascii=False) + "\n")
+                self.stats["pairs"] += len(pairs)
+
+            # Results reach disk before their ids are checkpointed
+            out.write("".join(lines))
+            out.flush()
+            os.fsync(out.fileno())
+            done.write("".join(f"{seed_id}\n" for seed_id, _ in batch))
+            done.flush()
+            self.stats["batches"] += 1
+            self.stats["items"] += len(batch)
+            queue.task_done()
+
+    async def run(self, input_path, output_path, limit=None):
+        done_path = output_path + ".done"
+        completed = load_done(done_path)
+        truncate_partial_line(output_path)
+        orphaned = drop_unfinished_rows(output_path, completed)
+        stale = invalidate_changed_seeds(input_path, output_path, completed)
+
+        # A small queue keeps reading the seed file in step with the workers
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        start = time.perf_counter()
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            with open(output_path, "a", encoding="utf-8") as out, open(done_path, "a", encoding="utf-8") as done:
+                workers = [asyncio.create_task(self.worker(session, queue, out, done)) for _ in range(self.concurrency)]
+                batch = []
+                for entry in iter_items(input_path, completed, limit):
+                    batch.append(entry)
+                    if len(batch) == self.batch_size:
+                        await queue.put(batch)
+                        batch = []
+                if batch:
+                    await queue.put(batch)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+
+        self.stats["skipped"] = len(completed)
+        self.stats["invalidated"] = len(stale)
+        self.stats["orphaned_rows"] = orphaned
+        self.stats["seconds"] = round(time.perf_counter() - start, 2)
+        return self.stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Amplify seed Q&A pairs or text chunks through an OpenAI-compatible endpoint.")
+    parser.add_argument("input", help="JSONL of seed pairs (question/answer) or chunks (text)")
+    parser.add_argument("-o", "--output", required=True, help="amplified JSONL path (appended to on resume)")
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL", "http://localhost:8000/v1"))
+    parser.add_argument("--model", default="unsloth/Llama-3.2-3B-Instruct")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight")
+    parser.add_argument("--batch-size", type=int, default=8, help="prompts per request")
+    parser.add_argument("--variants", type=int, default=5, help="pairs requested per seed or chunk")
+    parser.add_argument("--max-tokens", type=int, default=512)
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--top-p", type=float, default=0.95)
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=None, help="only use the first N input rows")
+    args = parser.parse_args(argv)
+
+    amplifier = Amplifier(
+        args.base_url, args.model, concurrency=args.concurrency, batch_size=args.batch_size,
+        variants=args.variants, max_tokens=args.max_tokens, temperature=args.temperature,
+        top_p=args.top_p, retries=args.retries,
+    )
+    stats = asyncio.run(amplifier.run(args.input, args.output, args.limit))
+    print(json.dumps(stats, indent=2))
+    if stats["failed"]:
+        # Failed batches are retried by the next run; report the run as incomplete
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
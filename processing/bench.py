@@ -0,0 +1,137 @@
+"""Benchmarks for the Q&A generation and JSONL export path.
+
+Each case runs `--repeat` times, every run in a fresh spawned interpreter so its
+peak RSS is its own, and the medians are reported and compared:
+
+    python bench.py                                  # run and print results
+    python bench.py --output results.json            # also save machine-readable results
+    python bench.py --save-baseline                  # record bench_baseline.json on this box
+    python bench.py --compare bench_baseline.json    # exit 1 on a throughput or memory regression
+
+Baselines are machine-specific, so record one on the generation box itself.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+DEFAULT_SIZES = (500, 3_000, 100_000, 1_000_000)
+CASES = ("generate", "serialize", "write")
+DEFAULT_BASELINE = "bench_baseline.json"
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_case(case, rows):
+    import qa
+
+    start = time.perf_counter()
+    written = 0
+    if case == "generate":
+        for _ in qa.iter_qa_pairs(rows):
+            pass
+    elif case == "serialize":
+        for item in qa.iter_qa_pairs(rows):
+            written += len(json.dumps(item, ensure_ascii=False).encode("utf-8")) + 1
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.jsonl")
+            qa.write_jsonl(qa.iter_qa_pairs(rows), path)
+            written = os.path.getsize(path)
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "bytes": written, "peak_rss": _peak_rss_bytes()}
+
+
+def run_case(case, rows, repeat):
+    """Median time and peak RSS of `repeat` runs, each in a new process."""
+    ctx = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        with ctx.Pool(1) as pool:
+            runs.append(pool.apply(_run_case, (case, rows)))
+    times = [run["seconds"] for run in runs]
+    seconds = max(statistics.median(times), 1e-9)
+    written = runs[0]["bytes"]
+    return {
+        "case": case,
+        "rows": rows,
+        "repeat": repeat,
+        "seconds": round(seconds, 4),
+        "min_seconds": round(min(times), 4),
+        "max_seconds": round(max(times), 4),
+        "rows_per_sec": round(rows / seconds, 1),
+        "bytes_per_sec": round(written / seconds, 1) if written else None,
+        "peak_rss_mb": round(statistics.median(run["peak_rss"] for run in runs) / 2**20, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions where throughput dropped, or peak RSS grew, by more than `tolerance`."""
+    reference = {(r["case"], r["rows"]): r for r in baseline["results"]}
+    failures = []
+    for result in results:
+        base = reference.get((result["case"], result["rows"]))
+        if base is None:
+            continue
+        if result["rows_per_sec"] < base["rows_per_sec"] * (1 - tolerance):
+            failures.append(f"{result['case']}@{result['rows']}: {result['rows_per_sec']:.0f} rows/s vs baseline {base['rows_per_sec']:.0f}")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            failures.append(f"{result['case']}@{result['rows']}: peak RSS {result['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']} MB")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Q&A generation, serialization and JSONL writing.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="row counts to benchmark")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; results are their median")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail if results regress against this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional regression before failing")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH", help="write results as the new baseline")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    results = []
+    for rows in args.sizes:
+        for case in args.cases:
+            result = run_case(case, rows, args.repeat)
+            results.append(result)
+            print(f"{case:>9} {rows:>9} rows  {result['seconds']:>8.3f}s  {result['rows_per_sec']:>12,.0f} rows/s  "
+                  f"{(result['bytes_per_sec'] or 0) / 2**20:>8.1f} MB/s  peak {result['peak_rss_mb']:>7.1f} MB  "
+                  f"(median of {args.repeat}, {result['min_seconds']:.3f}-{result['max_seconds']:.3f}s)")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against '{args.compare}'.")
+
+
+if __name__ == "__main__":
+    main()
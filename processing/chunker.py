@@ -0,0 +1,127 @@
+import argparse
+import json
+import mmap
+import os
+import re
+from collections import deque
+from typing import NamedTuple
+
+from ingest import DEFAULT_OUTPUT as DEFAULT_CORPUS, MANIFEST
+
+# Windows are measured in regex words (a word run or one punctuation mark), not in
+# the embedding model's tokens. WordPiece/BPE split scholarly English into roughly
+# 1.2-1.5 tokens per such word, more for formulas and PDF debris, so 256 words keeps
+# a chunk well inside the 512-token limit of BGE-style embedders.
+DEFAULT_WINDOW_WORDS = 256
+DEFAULT_OVERLAP_WORDS = 64
+# Words over UTF-8 bytes. Non-ASCII bytes count as word characters so a chunk
+# boundary never falls inside a multi-byte character; page markers left by
+# ingest.py are skipped rather than counted.
+WORD = re.compile(rb"(?P<marker><!--.*?-->)|[\w\x80-\xff]+|[^\w\s\x80-\xff]", re.DOTALL)
+
+
+class Chunk(NamedTuple):
+    """A window of a corpus document as UTF-8 byte offsets into its Markdown file."""
+
+    doc_id: str
+    start: int
+    end: int
+
+
+def iter_windows(data, window=DEFAULT_WINDOW_WORDS, overlap=DEFAULT_OVERLAP_WORDS):
+    """(start, end) byte ranges of `window` words, consecutive windows sharing `overlap` words.
+
+    `data` is any bytes-like object the re module accepts, including an mmap, so
+    only the spans of the current window are ever held in memory.
+    """
+    if not 0 <= overlap < window:
+        raise ValueError(f"overlap must be in [0, {window}), got {overlap}")
+    spans = deque()
+    fresh = 0
+    for match in WORD.finditer(data):
+        if match.lastgroup == "marker":
+            continue
+        spans.append(match.span())
+        fresh += 1
+        if len(spans) == window:
+            yield spans[0][0], spans[-1][1]
+            for _ in range(window - overlap):
+                spans.popleft()
+            fresh = 0
+    if fresh:
+        # Trailing words not yet covered by a full window
+        yield spans[0][0], spans[-1][1]
+
+
+def load_manifest(corpus_dir=DEFAULT_CORPUS):
+    with open(os.path.join(corpus_dir, MANIFEST), encoding="utf-8") as f:
+        return json.load(f)["documents"]
+
+
+class Corpus:
+    """Documents written by ingest.py, opened lazily and memory-mapped for chunking and slicing."""
+
+    def __init__(self, corpus_dir=DEFAULT_CORPUS):
+        self.corpus_dir = corpus_dir
+        self.documents = load_manifest(corpus_dir)
+        self._maps = {}
+
+    def close(self):
+        for f, mm in self._maps.values():
+            if mm is not None:
+                mm.close()
+            f.close()
+        self._maps.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def path(self, doc_id):
+        return os.path.join(self.corpus_dir, self.documents[doc_id]["output"])
+
+    def data(self, doc_id):
+        entry = self._maps.get(doc_id)
+        if entry is None:
+            f = open(self.path(doc_id), "rb")
+            # Empty files cannot be mapped
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+            entry = self._maps[doc_id] = (f, mm)
+        return entry[1] if entry[1] is not None else b""
+
+    def chunks(self, window=DEFAULT_WINDOW_WORDS, overlap=DEFAULT_OVERLAP_WORDS, doc_ids=None):
+        """Yield `Chunk`s document by document; no text is copied."""
+        for doc_id in doc_ids or self.documents:
+            for start, end in iter_windows(self.data(doc_id), window, overlap):
+                yield Chunk(doc_id, start, end)
+
+    def text(self, chunk):
+        return self.data(chunk.doc_id)[chunk.start:chunk.end].decode("utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split the ingested corpus into overlapping word windows.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="directory written by ingest.py")
+    parser.add_argument("-o", "--output", default="chunks.jsonl")
+    parser.add_argument("--window-words", "--window", dest="window", type=int, default=DEFAULT_WINDOW_WORDS,
+                        help="regex words per chunk (not model tokens; expect about 1.3 tokens per word)")
+    parser.add_argument("--overlap-words", "--overlap", dest="overlap", type=int, default=DEFAULT_OVERLAP_WORDS,
+                        help="words shared by consecutive chunks")
+    parser.add_argument("--text", action="store_true", help="include chunk text (the input format amplify.py expects)")
+    args = parser.parse_args(argv)
+
+    count = 0
+    with Corpus(args.corpus) as corpus, open(args.output, "w", encoding="utf-8", buffering=1 << 20) as f:
+        for chunk in corpus.chunks(args.window, args.overlap):
+            record = {"source": chunk.doc_id, "start": chunk.start, "end": chunk.end}
+            if args.text:
+                record["text"] = corpus.text(chunk)
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    print(f"Wrote {count} chunks to '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import hashlib
+import math
+
+
+class CombinationSpace:
+    """Random-access index over the cartesian product of several option lists.
+
+    Row n maps to one digit per list in O(1) via mixed-radix decomposition, so any
+    shard or resume point is computed directly instead of replaying a loop. Every
+    window of `len(space)` consecutive rows visits each combination exactly once.
+
+    Digits are skewed diagonally (digit k is shifted by the sum of the lower
+    digits), which makes the first rows cycle every list together like the old
+    `i % len(...)` lookups while still covering the whole product without repeats.
+    With a seed, row indices are first passed through a keyed Feistel permutation
+    (cycle-walked onto [0, size)), giving a shuffled but reproducible order.
+    """
+
+    def __init__(self, radices, seed=None):
+        self.radices = tuple(radices)
+        if not self.radices or min(self.radices) < 1:
+            raise ValueError("every option list must be non-empty")
+        self.size = math.prod(self.radices)
+        self.seed = seed
+
+        bits = max(2, (self.size - 1).bit_length())
+        bits += bits % 2
+        self._half = bits // 2
+        self._mask = (1 << self._half) - 1
+        self._keys = None
+        if seed is not None:
+            self._keys = [
+                int.from_bytes(hashlib.blake2b(f"{seed}:{r}".encode(), digest_size=8).digest(), "big")
+                for r in range(4)
+            ]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, n):
+        return self.digits(n)
+
+    def _round(self, key, x):
+        h = ((x ^ key) * 0x45D9F3B) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 29
+        h = (h * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        h ^= h >> 32
+        return h & self._mask
+
+    def _permute(self, m):
+        x = m
+        while True:
+            left, right = x >> self._half, x & self._mask
+            for key in self._keys:
+                left, right = right, left ^ self._round(key, right)
+            x = (left << self._half) | right
+            if x < self.size:
+                return x
+
+    def _unpermute(self, m):
+        x = m
+        while True:
+            left, right = x >> self._half, x & self._mask
+            for key in reversed(self._keys):
+                left, right = right ^ self._round(key, left), left
+            x = (left << self._half) | right
+            if x < self.size:
+                return x
+
+    def digits(self, n):
+        """Indices into each option list for row n (rows past `size` wrap around)."""
+        m = n % self.size
+        if self._keys is not None:
+            m = self._permute(m)
+
+        result = []
+        carry = 0
+        for radix in self.radices:
+            m, q = divmod(m, radix)
+            result.append((q + carry) % radix)
+            carry += q
+        return tuple(result)
+
+    def index(self, digits):
+        """Inverse of `digits`: the first row in [0, size) that produces this combination."""
+        m = 0
+        stride = 1
+        carry = 0
+        for radix, d in zip(self.radices, digits):
+            q = (d - carry) % radix
+            m += q * stride
+            stride *= radix
+            carry += q
+        if self._keys is not None:
+            m = self._unpermute(m)
+        return m
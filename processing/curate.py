@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dedup import QUESTION_ID, word_hash
+
+# Terms whose presence marks a pair as covering a core theme or hypothesis (see qa.py)
+THEME_TERMS = (
+    "pilar", "prospects", "involved", "liked", "agency", "respect", "prosocial", "sgls", "selection",
+    "inequality", "thorngate", "complexity", "dra", "agent", "egalitarian", "transformation",
+    "positive", "zero", "sum",
+)
+HYPOTHESIS_TERMS = (
+    "eucrm", "teaching", "orientation", "viability", "aversion", "engagement", "egalitarian",
+    "reticence", "priming", "ancestral", "hierarchy", "steepness", "confidence", "performance", "trio",
+)
+STOP_WORDS = frozenset("the a an and or of in on to for by with as is are be that this its it we our per via".split())
+
+DEFAULT_WEIGHTS = {"repetition": 1.0, "diversity": 1.0, "overlap": 1.0, "coverage": 1.0}
+# A row whose trigrams are all template text still scores about 0.75 when the other
+# components are good, so rows under 0.7 fail at least one more check
+DEFAULT_THRESHOLD = 0.7
+TRIGRAM_PRIME = np.uint64(0x100000001B3)
+# Corpus-wide trigram row counts are kept in this many hash buckets (16 MB of uint32)
+TRIGRAM_BUCKETS = 1 << 22
+
+
+def _hash_set(terms):
+    return np.array(sorted({word_hash(t) for t in terms}), dtype=np.uint64)
+
+
+THEME_HASHES = _hash_set(THEME_TERMS)
+HYPOTHESIS_HASHES = _hash_set(HYPOTHESIS_TERMS)
+STOP_HASHES = _hash_set(STOP_WORDS)
+
+
+# Same normalization as dedup.normalize, applied to a whole batch at once: every byte
+# outside [0-9a-z] (including non-ASCII, encoded as "?") becomes a space
+SEPARATOR = b"\0"
+BYTE_MAP = bytes(b if (48 <= b <= 57 or 97 <= b <= 122 or b == 0) else 32 for b in range(256))
+
+
+def _tokens(texts):
+    """Concatenated word hashes for a batch of texts, with the row each token came from."""
+    text = "\0".join(QUESTION_ID.sub("", t.replace("\0", " "), count=1) for t in texts)
+    data = text.lower().encode("ascii", "replace").translate(BYTE_MAP)
+    words = [row.split() for row in data.split(SEPARATOR)]
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+    vocab = {w: word_hash(w.decode("ascii")) for w in set(chain.from_iterable(words))}
+    hashes = np.fromiter(map(vocab.__getitem__, chain.from_iterable(words)), dtype=np.uint64, count=int(lengths.sum()))
+    rows = np.repeat(np.arange(len(texts)), lengths)
+    return hashes, rows, lengths
+
+
+def _sorted_unique(values):
+    values = np.sort(values)
+    keep = np.ones(values.size, dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
+
+
+def _distinct(rows, hashes):
+    """Unique (row, hash) pairs as sorted combined keys (row in the high 32 bits)."""
+    return _sorted_unique((rows.astype(np.uint64) << np.uint64(32)) | (hashes & np.uint64(0xFFFFFFFF)))
+
+
+def _trigrams(q_hash, q_row, a_hash, a_row, n):
+    """Question and answer word trigram hashes with their rows; questions and answers never join into one trigram."""
+    hashes = np.concatenate([q_hash, a_hash])
+    rows = np.concatenate([q_row, a_row + n])
+    valid = rows[:-2] == rows[2:]
+    trigrams = (hashes[:-2] * TRIGRAM_PRIME + hashes[1:-1]) * TRIGRAM_PRIME + hashes[2:]
+    return trigrams[valid], rows[:-2][valid] % n
+
+
+def _bucket(trigrams):
+    return (trigrams & np.uint64(TRIGRAM_BUCKETS - 1)).astype(np.int64)
+
+
+def _row_buckets(records):
+    """Trigram bucket of every distinct (record, trigram) pair."""
+    q_hash, q_row, _ = _tokens([r.get("question", "") for r in records])
+    a_hash, a_row, _ = _tokens([r.get("answer", "") for r in records])
+    trigrams, tri_rows = _trigrams(q_hash, q_row, a_hash, a_row, len(records))
+    return _bucket(_distinct(tri_rows, trigrams))
+
+
+def trigram_row_counts(records):
+    """Number of records containing each trigram, by hash bucket; tables of several batches add up."""
+    return np.bincount(_row_buckets(records), minlength=TRIGRAM_BUCKETS).astype(np.uint32)
+
+
+def score_batch(records, min_question=5, max_question=120, min_answer=15, max_answer=400, template_share=0.05,
+                template_min_rows=10, weights=None, trigram_rows=None, corpus_rows=None):
+    """Vectorized quality scores for a batch of Q&A records.
+
+    Returns a dict of per-row numpy arrays: word counts, `length_ok`, and component
+    scores in [0, 1] where higher is better:
+
+    - repetition: 1 - share of the row's word trigrams that occur in more than
+      `template_share` of the corpus's rows and in at least `template_min_rows`
+      rows (templated boilerplate). `trigram_rows` is the corpus table from
+      `trigram_row_counts` over `corpus_rows` records; without it the batch is
+      the corpus
+    - diversity: answer type/token ratio
+    - overlap: question/answer content-word Jaccard, penalized when the answer is
+      off-topic (< 0.05) or just restates the question (> 0.6)
+    - coverage: half for mentioning a core theme term, half for a hypothesis term
+
+    `score` is the weighted mean of the components, zeroed when lengths are out of bounds.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    n = len(records)
+    q_hash, q_row, q_len = _tokens([r.get("question", "") for r in records])
+    a_hash, a_row, a_len = _tokens([r.get("answer", "") for r in records])
+    length_ok = (q_len >= min_question) & (q_len <= max_question) & (a_len >= min_answer) & (a_len <= max_answer)
+
+    # Lexical diversity of the answer
+    a_keys = _distinct(a_row, a_hash)
+    a_unique = np.bincount((a_keys >> np.uint64(32)).astype(np.int64), minlength=n)
+    diversity = np.divide(a_unique, a_len, out=np.zeros(n), where=a_len > 0)
+
+    # Template repetition over question+answer trigrams shared across the corpus
+    trigrams, tri_rows = _trigrams(q_hash, q_row, a_hash, a_row, n)
+    if trigram_rows is None:
+        trigram_rows, corpus_rows = trigram_row_counts(records), n
+    containing = trigram_rows[_bucket(trigrams)]
+    boilerplate = (containing > template_share * corpus_rows) & (containing >= template_min_rows)
+    total = np.bincount(tri_rows, minlength=n)
+    shared = np.bincount(tri_rows, weights=boilerplate, minlength=n)
+    repetition = 1 - np.divide(shared, total, out=np.zeros(n), where=total > 0)
+
+    # Content-word overlap between question and answer
+    q_content = ~np.isin(q_hash, STOP_HASHES)
+    a_content = ~np.isin(a_hash, STOP_HASHES)
+    q_keys = _distinct(q_row[q_content], q_hash[q_content])
+    a_keys_content = _distinct(a_row[a_content], a_hash[a_content])
+    common = np.intersect1d(q_keys, a_keys_content, assume_unique=True)
+    inter = np.bincount((common >> np.uint64(32)).astype(np.int64), minlength=n)
+    union = (
+        np.bincount((q_keys >> np.uint64(32)).astype(np.int64), minlength=n)
+        + np.bincount((a_keys_content >> np.uint64(32)).astype(np.int64), minlength=n)
+        - inter
+    )
+    jaccard = np.divide(inter, union, out=np.zeros(n), where=union > 0)
+    overlap = np.clip(jaccard / 0.05, 0, 1) - np.clip((jaccard - 0.6) / 0.4, 0, 1)
+
+    # Theme and hypothesis coverage over both fields
+    all_hash = np.concatenate([q_hash, a_hash])
+    all_row = np.concatenate([q_row, a_row])
+    theme_hit = np.bincount(all_row[np.isin(all_hash, THEME_HASHES)], minlength=n) > 0
+    hypothesis_hit = np.bincount(all_row[np.isin(all_hash, HYPOTHESIS_HASHES)], minlength=n) > 0
+    coverage = 0.5 * theme_hit + 0.5 * hypothesis_hit
+
+    components = {"repetition": repetition, "diversity": diversity, "overlap": overlap, "coverage": coverage}
+    total_weight = sum(weights.values())
+    score = sum(weights[name] * components[name] for name in weights) / total_weight * length_ok
+    return {"question_words": q_len, "answer_words": a_len, "length_ok": length_ok, **components, "score": score}
+
+
+_corpus = None  # (trigram row counts, rows) of the whole input, set in each worker of the scoring pass
+
+
+def _set_corpus(trigram_rows, corpus_rows):
+    global _corpus
+    _corpus = trigram_rows, corpus_rows
+
+
+def _count_batch(lines):
+    # Runs in a worker: (buckets, row counts) of the trigrams in one batch of raw lines
+    return np.unique(_row_buckets([json.loads(line) for line in lines]), return_counts=True), len(lines)
+
+
+def _curate_batch(task):
+    # Runs in a worker: score one batch of raw lines and keep those above threshold
+    lines, threshold, want_scores, options = task
+    records = [json.loads(line) for line in lines]
+    scores = score_batch(records, **options, trigram_rows=_corpus[0], corpus_rows=_corpus[1])
+    keep = scores["score"] >= threshold
+    kept = [line for line, k in zip(lines, keep) if k]
+    if not want_scores:
+        return kept, []
+    columns = {name: np.round(values, 4).tolist() if values.dtype.kind == "f" else values.astype(int).tolist() for name, values in scores.items()}
+    rows = [json.dumps(dict(zip(columns, values))) + "\n" for values in zip(*columns.values())]
+    return kept, rows
+
+
+def _batches(path, batch_size):
+    batch = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                batch.append(line if line.endswith("\n") else line + "\n")
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def _map_ordered(pool, fn, tasks, depth):
+    """Yield fn(task) in task order with at most `depth` tasks in flight."""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        while len(pending) > depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def curate_jsonl(input_path, output_path, threshold=DEFAULT_THRESHOLD, scores_path=None, batch_size=20_000, workers=None, **options):
+    """Score and filter a Q&A JSONL file in batches on a process pool, preserving row order.
+
+    A first pass counts how many rows of the whole file contain each word
+    trigram, so template detection does not depend on the batch size; the
+    second scores and filters. At most two batches per worker are in flight,
+    so memory stays bounded by the batch size rather than the file size.
+    """
+    workers = workers or os.cpu_count() or 1
+    trigram_rows = np.zeros(TRIGRAM_BUCKETS, dtype=np.uint32)
+    total = kept = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for (buckets, counts), rows in _map_ordered(pool, _count_batch, _batches(input_path, batch_size), workers * 2):
+            trigram_rows[buckets] += counts.astype(np.uint32)
+            total += rows
+
+    scores_file = open(scores_path, "w", encoding="utf-8") if scores_path else None
+    tasks = ((batch, threshold, scores_file is not None, options) for batch in _batches(input_path, batch_size))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_set_corpus, initargs=(trigram_rows, total)) as pool, \
+                open(output_path, "w", encoding="utf-8", buffering=1 << 20) as out:
+            for lines, rows in _map_ordered(pool, _curate_batch, tasks, workers * 2):
+                out.writelines(lines)
+                kept += len(lines)
+                if scores_file:
+                    scores_file.writelines(rows)
+    finally:
+        if scores_file:
+            scores_file.close()
+    return {"rows": total, "kept": kept, "dropped": total - kept}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score generated Q&A pairs with vectorized heuristics and keep those above a threshold.")
+    parser.add_argument("input", help="input JSONL path")
+    parser.add_argument("-o", "--output", required=True, help="curated JSONL path")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="minimum weighted score to keep a pair")
+    parser.add_argument("--scores", help="write per-row component scores as JSONL")
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--min-question", type=int, default=5, help="minimum question length in words")
+    parser.add_argument("--max-question", type=int, default=120)
+    parser.add_argument("--min-answer", type=int, default=15, help="minimum answer length in words")
+    parser.add_argument("--max-answer", type=int, default=400)
+    parser.add_argument("--template-share", type=float, default=0.05, help="trigrams in more than this share of all rows count as template text")
+    parser.add_argument("--template-min-rows", type=int, default=10, help="...and in at least this many of its rows")
+    parser.add_argument("--weights", type=json.loads, default=None, help='JSON weights, e.g. \'{"repetition": 2, "diversity": 1, "overlap": 1, "coverage": 1}\'')
+    args = parser.parse_args(argv)
+
+    stats = curate_jsonl(
+        args.input, args.output, args.threshold, args.scores, args.batch_size, args.workers,
+        min_question=args.min_question, max_question=args.max_question,
+        min_answer=args.min_answer, max_answer=args.max_answer,
+        template_share=args.template_share, template_min_rows=args.template_min_rows, weights=args.weights,
+    )
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
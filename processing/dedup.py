@@ -0,0 +1,160 @@
+import argparse
+import json
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+QUESTION_ID = re.compile(r"^\s*Q\d+:\s*")
+NON_WORD = re.compile(r"[^0-9a-z]+")
+FIELDS = ("question", "answer")
+
+
+def normalize(text):
+    """Lowercase, drop the generator's `Qn:` prefix and collapse punctuation to spaces."""
+    return NON_WORD.sub(" ", QUESTION_ID.sub("", text).lower()).split()
+
+
+@lru_cache(maxsize=1 << 20)
+def word_hash(word):
+    return zlib.crc32(word.encode())
+
+
+def shingle_hashes(record, k=3):
+    """Hashes of word k-shingles over the question and answer fields, combined from per-word hashes."""
+    parts = []
+    for f, field in enumerate(FIELDS):
+        words = normalize(record.get(field, ""))
+        w = np.fromiter(map(word_hash, words), dtype=np.uint64, count=len(words))
+        if w.size < k:
+            w = np.concatenate([w, np.zeros(k - w.size, dtype=np.uint64)])
+        # Polynomial combination of k consecutive word hashes; wraps modulo 2**64
+        h = np.full(w.size - k + 1, f + 1, dtype=np.uint64)
+        for j in range(k):
+            h = h * np.uint64(0x100000001B3) + w[j:w.size - k + 1 + j]
+        parts.append(h)
+    return np.concatenate(parts)
+
+
+class MinHasher:
+    """MinHash signatures using multiply-shift hashing (one random odd 64-bit multiplier per permutation)."""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2**63, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, hashes):
+        if hashes.size == 0:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        # uint64 multiplication wraps modulo 2**64, which is exactly the multiply-shift family
+        return ((self.a * hashes + self.b) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures; each band bucket lists every kept (unique) row that hashed to it."""
+
+    def __init__(self, num_perm=128, bands=16, threshold=0.8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.tables = [{} for _ in range(bands)]
+        self.signatures = []
+
+    def _band_keys(self, sig):
+        raw = sig.tobytes()
+        width = self.rows * 4
+        return [hash(raw[b * width:(b + 1) * width]) for b in range(self.bands)]
+
+    def query_or_insert(self, sig):
+        """Return (representative id, estimated Jaccard) for a near-duplicate, else index sig and return (None, 0)."""
+        keys = self._band_keys(sig)
+        seen = set()
+        for table, key in zip(self.tables, keys):
+            for rep in table.get(key, ()):
+                if rep in seen:
+                    continue
+                seen.add(rep)
+                similarity = np.count_nonzero(self.signatures[rep] == sig) / sig.size
+                if similarity >= self.threshold:
+                    return rep, similarity
+
+        rep = len(self.signatures)
+        self.signatures.append(sig)
+        for table, key in zip(self.tables, keys):
+            table.setdefault(key, []).append(rep)
+        return None, 0.0
+
+
+def dedup_jsonl(input_path, output_path, clusters_path=None, threshold=0.8, num_perm=128, bands=16, shingle_size=3):
+    """Stream a Q&A JSONL file, keeping the first row of each near-duplicate cluster.
+
+    Rows are read and written one line at a time; memory grows with the number of
+    unique rows (one signature plus one band entry per band), not with input size.
+    Each dropped row is written to `clusters_path` as it is found.
+    """
+    hasher = MinHasher(num_perm)
+    index = LSHIndex(num_perm, bands, threshold)
+    kept_rows = []  # input row number of each representative
+    cluster_sizes = Counter()
+    total = kept = 0
+
+    clusters = open(clusters_path, "w", encoding="utf-8") if clusters_path else None
+    try:
+        with open(input_path, encoding="utf-8") as src, open(output_path, "w", encoding="utf-8", buffering=1 << 20) as dst:
+            for row, line in enumerate(src):
+                if not line.strip():
+                    continue
+                total += 1
+                sig = hasher.signature(shingle_hashes(json.loads(line), shingle_size))
+                rep, similarity = index.query_or_insert(sig)
+                if rep is None:
+                    kept_rows.append(row)
+                    kept += 1
+                    dst.write(line if line.endswith("\n") else line + "\n")
+                    continue
+                cluster_sizes[rep] += 1
+                if clusters:
+                    clusters.write(json.dumps({"row": row, "duplicate_of": kept_rows[rep], "similarity": round(similarity, 4)}) + "\n")
+    finally:
+        if clusters:
+            clusters.close()
+
+    largest = [
+        {"row": kept_rows[rep], "duplicates": size}
+        for rep, size in cluster_sizes.most_common(10)
+    ]
+    return {
+        "rows": total,
+        "kept": kept,
+        "dropped": total - kept,
+        "clusters": len(cluster_sizes),
+        "largest_clusters": largest,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove near-duplicate Q&A pairs from a JSONL file with MinHash/LSH.")
+    parser.add_argument("input", help="input JSONL path")
+    parser.add_argument("-o", "--output", required=True, help="deduplicated JSONL path")
+    parser.add_argument("--clusters", help="write one JSON line per dropped row (row, duplicate_of, similarity)")
+    parser.add_argument("--threshold", type=float, default=0.8, help="estimated Jaccard similarity at which rows count as duplicates")
+    parser.add_argument("--num-perm", type=int, default=128, help="MinHash permutations per signature")
+    parser.add_argument("--bands", type=int, default=16, help="LSH bands (num-perm must be divisible by this)")
+    parser.add_argument("--shingle-size", type=int, default=3, help="words per shingle")
+    args = parser.parse_args(argv)
+
+    stats = dedup_jsonl(
+        args.input, args.output, args.clusters,
+        threshold=args.threshold, num_perm=args.num_perm, bands=args.bands, shingle_size=args.shingle_size,
+    )
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
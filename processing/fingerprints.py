@@ -0,0 +1,45 @@
+import hashlib
+import os
+
+# Fingerprint sidecars hold one fixed-width digest per JSONL row, in row order
+FP_SIZE = 16
+SUFFIX = ".fp"
+
+
+def digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=FP_SIZE).digest()
+
+
+def combine(*digests):
+    """Fingerprint of an ordered tuple of fixed-width digests."""
+    return hashlib.blake2b(b"".join(digests), digest_size=FP_SIZE).digest()
+
+
+def sidecar_path(path):
+    return str(path) + SUFFIX
+
+
+def read_index(path):
+    """Whole sidecar as bytes (16 bytes per row), or None when it does not exist."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) % FP_SIZE:
+        raise ValueError(f"{path} is truncated")
+    return data
+
+
+def row_fingerprint(index, row):
+    if index is None or (row + 1) * FP_SIZE > len(index):
+        return None
+    return index[row * FP_SIZE:(row + 1) * FP_SIZE]
+
+
+def write_index(path, digests):
+    count = 0
+    with open(path, "wb", buffering=1 << 20) as f:
+        for fp in digests:
+            f.write(fp)
+            count += 1
+    return count
@@ -0,0 +1,121 @@
+"""Precompute a supporting passage from the research corpus for every generator combination.
+
+    python ingest.py && python chunker.py --text --window-words 256 -o chunks.jsonl
+    (cd .. && python -m vector.bm25 build processing/chunks.jsonl -o vector/bm25)
+    PYTHONPATH=.. python grounding.py         # -> grounding.json
+    python qa.py --grounding grounding.json   # answers quote the passages
+
+Retrieval runs once per (theme, hypothesis, theory) query, scoring every chunk
+in one BM25 pass; the best chunk of each source is then reduced to its most
+relevant sentence. Combinations a source has no matching chunk for are left
+out, so their rows stay ungrounded. The table is rebuilt only when the index or
+the generator's lists change, and qa.py reads it as a plain dict lookup per
+row. The `vector` package is imported from the repository root, which must be
+on PYTHONPATH (main.py sets it for the ground stage).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+import qa
+from chunker import Chunk, Corpus
+from ingest import DEFAULT_OUTPUT as DEFAULT_CORPUS
+from vector.bm25 import BM25Index, tokenize
+
+DEFAULT_INDEX = str(Path(__file__).resolve().parent.parent / "vector" / "bm25")
+DEFAULT_OUTPUT = "grounding.json"
+SENTENCE = re.compile(r"(?<=[.!?])\s+")
+# Page markers, bold/italic markup and bracketed citation numbers
+MARKUP = re.compile(r"<!--.*?-->|\*+|_{2,}|\[\d+(?:,\s*\d+)*\]", re.DOTALL)
+MIN_SENTENCE, MAX_SENTENCE = 40, 400
+
+
+def table_fingerprint(index_dir):
+    """Changes whenever the index or any list the queries are built from changes."""
+    h = hashlib.blake2b(digest_size=16)
+    for name in ("index.json", "docs.jsonl"):
+        with open(os.path.join(index_dir, name), "rb") as f:
+            h.update(f.read())
+    h.update(json.dumps([qa.core_themes, qa.hypotheses, qa.theories, qa.sources]).encode("utf-8"))
+    return h.hexdigest()
+
+
+def best_sentence(text, index, terms):
+    """The sentence of `text` covering the most query-term idf, clipped to a readable length."""
+    text = " ".join(MARKUP.sub(" ", text).split())
+    candidates = []
+    for sentence in SENTENCE.split(text):
+        if len(sentence) > MAX_SENTENCE:
+            sentence = sentence[:sentence.rfind(" ", 0, MAX_SENTENCE)] + "…"
+        if len(sentence) >= MIN_SENTENCE:
+            candidates.append(sentence)
+    # Chunks usually open mid-sentence; prefer sentences that start properly
+    candidates = [c for c in candidates if c[0].isupper() or c[0].isdigit()] or candidates or [text[:MAX_SENTENCE]]
+    weights = {term: index.idf(term) for term in terms}
+    return max(candidates, key=lambda s: sum(weights.get(t, 0.0) for t in set(tokenize(s))))
+
+
+def build_table(index_dir=DEFAULT_INDEX, corpus_dir=DEFAULT_CORPUS):
+    """[{theme, hypothesis, theory, source, passage}] for every combination with a matching chunk in its source."""
+    index = BM25Index(index_dir)
+    docs = index.docs()
+    by_source = {}
+    for row, doc in enumerate(docs):
+        by_source.setdefault(doc["source"], []).append(row)
+    source_rows = {source: np.array(by_source[source]) for source in qa.sources if source in by_source}
+
+    table = []
+    with Corpus(corpus_dir) as corpus:
+        for theme in qa.core_themes:
+            for hypo in qa.hypotheses:
+                for theory in qa.theories:
+                    query = f"{theme} {hypo} {theory}"
+                    terms = set(tokenize(query))
+                    scores = index.scores(query)
+                    for source, rows in source_rows.items():
+                        best = rows[np.argmax(scores[rows])]
+                        if scores[best] <= 0:
+                            # No query term occurs in this source; its first chunk would be an arbitrary quote
+                            continue
+                        doc = docs[best]
+                        text = corpus.text(Chunk(source, doc["start"], doc["end"]))
+                        table.append({
+                            "theme": theme, "hypothesis": hypo, "theory": theory, "source": source,
+                            "passage": best_sentence(text, index, terms),
+                        })
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute retrieved passages for the Q&A generator.")
+    parser.add_argument("--index", default=DEFAULT_INDEX, help="BM25 index directory (vector/bm25.py)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="directory written by ingest.py")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--force", action="store_true", help="rebuild even if the table is current")
+    args = parser.parse_args(argv)
+
+    fingerprint = table_fingerprint(args.index)
+    if not args.force and os.path.exists(args.output):
+        with open(args.output, encoding="utf-8") as f:
+            if json.load(f).get("fingerprint") == fingerprint:
+                print(f"'{args.output}' is up to date.")
+                return
+
+    table = build_table(args.index, args.corpus)
+    missing = sorted(set(qa.sources) - {r["source"] for r in table})
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "contexts": table}, f, ensure_ascii=False, indent=1)
+    combinations = len(qa.core_themes) * len(qa.hypotheses) * len(qa.theories) * len(qa.sources)
+    print(f"Wrote {len(table)} passages to '{args.output}'; {combinations - len(table)} of {combinations} combinations stay ungrounded.")
+    if missing:
+        print(f"No matching passage (or not indexed), rows from these sources stay ungrounded: {', '.join(missing)}")
+
+
+if __name__ == "__main__":
+    main()
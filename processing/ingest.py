@@ -0,0 +1,207 @@
+"""Convert the research corpus (PDF papers and extracted-insight Markdown) to normalized Markdown.
+
+    python ingest.py                                  # ../apriori-research -> corpus/
+    python ingest.py papers/*.pdf notes/*.md -o corpus --workers 8
+
+PDF pages are extracted in parallel and cached per page under
+`.cache/pages/<sha256>/`, keyed by the file's content hash, so a rerun only
+extracts papers that are new or changed. `corpus/ingest.json` maps each source
+filename (the doc id used as `source` in the Q&A rows) to its hash and output.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+DEFAULT_INPUTS = ("../apriori-research/papers/*.pdf", "../apriori-research/extracted_insights/*.md")
+DEFAULT_OUTPUT = "corpus"
+DEFAULT_CACHE = ".cache/pages"
+MANIFEST = "ingest.json"
+PAGES_PER_TASK = 8
+
+HYPHEN_BREAK = re.compile(r"(\w)-\n(\w)")
+SPACES = re.compile(r"[ \t\u00a0]+")
+BLANK_LINES = re.compile(r"\n{3,}")
+# A line ending like this closes its paragraph; anything else was wrapped by the PDF layout
+SENTENCE_END = re.compile(r"[.?!:;\"'”)]$")
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _pdf_reader(path):
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:
+        raise SystemExit("PDF ingestion needs pypdf: pip install pypdf") from exc
+    # Missing optional font helpers are reported per font; the text is still usable
+    logging.getLogger("pypdf").setLevel(logging.ERROR)
+    return PdfReader(path)
+
+
+def normalize_page(text):
+    """Turn raw extracted page text into Markdown paragraphs."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\u00ad", "")
+    text = HYPHEN_BREAK.sub(r"\1\2", text)
+    paragraphs, current = [], []
+    for line in text.split("\n"):
+        line = SPACES.sub(" ", line).strip()
+        if not line:
+            if current:
+                paragraphs.append(" ".join(current))
+                current = []
+            continue
+        current.append(line)
+        if SENTENCE_END.search(line) and len(line) < 60:
+            # Short line ending a sentence: a heading, caption or the tail of a paragraph
+            paragraphs.append(" ".join(current))
+            current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return "\n\n".join(paragraphs)
+
+
+def normalize_markdown(text):
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = "\n".join(line.rstrip() for line in text.split("\n"))
+    return BLANK_LINES.sub("\n\n", text).strip() + "\n"
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _page_path(cache_dir, sha, page):
+    return os.path.join(cache_dir, sha, f"{page:05d}.md")
+
+
+def _extract_pages(task):
+    # Runs in a worker: extract and cache a run of pages from one PDF
+    path, sha, pages, cache_dir = task
+    reader = _pdf_reader(path)
+    for page in pages:
+        _write_atomic(_page_path(cache_dir, sha, page), normalize_page(reader.pages[page].extract_text() or ""))
+    return len(pages)
+
+
+def page_count(path, sha, cache_dir):
+    """Number of pages, remembered next to the cached pages so unchanged PDFs are never opened."""
+    meta = os.path.join(cache_dir, sha, "meta.json")
+    if os.path.exists(meta):
+        with open(meta, encoding="utf-8") as f:
+            return json.load(f)["pages"]
+    pages = len(_pdf_reader(path).pages)
+    os.makedirs(os.path.dirname(meta), exist_ok=True)
+    _write_atomic(meta, json.dumps({"source": os.path.basename(path), "pages": pages}))
+    return pages
+
+
+def expand_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or ([pattern] if os.path.exists(pattern) else [])
+        paths.extend(p for p in matches if p.lower().endswith((".pdf", ".md")))
+    return paths
+
+
+def ingest(inputs, output_dir=DEFAULT_OUTPUT, cache_dir=DEFAULT_CACHE, workers=None):
+    """Ingest `inputs` into `output_dir`, extracting only PDF pages missing from the cache.
+
+    Returns stats with the number of documents, pages extracted and pages
+    served from the cache.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            previous = json.load(f)["documents"]
+
+    stats = {"documents": 0, "pages_extracted": 0, "pages_cached": 0, "unchanged": 0, "removed": 0}
+    documents = {}
+    outputs = {}
+    tasks = []
+    for path in inputs:
+        doc_id = os.path.basename(path)
+        if doc_id in documents:
+            raise ValueError(f"two inputs share the doc id {doc_id!r}")
+        output = f"{Path(doc_id).stem}.md"
+        if output in outputs:
+            raise ValueError(f"inputs {outputs[output]!r} and {doc_id!r} would both be written to {output!r}")
+        outputs[output] = doc_id
+        sha = file_sha256(path)
+        entry = {"sha256": sha, "path": path, "output": output, "pages": None}
+        if doc_id.lower().endswith(".pdf"):
+            entry["pages"] = page_count(path, sha, cache_dir)
+            missing = [p for p in range(entry["pages"]) if not os.path.exists(_page_path(cache_dir, sha, p))]
+            stats["pages_cached"] += entry["pages"] - len(missing)
+            for i in range(0, len(missing), PAGES_PER_TASK):
+                tasks.append((path, sha, missing[i:i + PAGES_PER_TASK], cache_dir))
+        documents[doc_id] = entry
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in as_completed([pool.submit(_extract_pages, task) for task in tasks]):
+                stats["pages_extracted"] += future.result()
+
+    for doc_id, entry in documents.items():
+        output = os.path.join(output_dir, entry["output"])
+        old = previous.get(doc_id)
+        if old and old["sha256"] == entry["sha256"] and old["output"] == entry["output"] and os.path.exists(output):
+            stats["unchanged"] += 1
+            continue
+        if entry["pages"] is None:
+            with open(entry["path"], encoding="utf-8") as f:
+                text = normalize_markdown(f.read())
+        else:
+            parts = []
+            for page in range(entry["pages"]):
+                with open(_page_path(cache_dir, entry["sha256"], page), encoding="utf-8") as f:
+                    parts.append(f"<!-- page {page + 1} -->\n\n{f.read()}".rstrip())
+            text = "\n\n".join(parts) + "\n"
+        _write_atomic(output, text)
+
+    # Outputs of documents no longer in the corpus go too
+    for doc_id, old in previous.items():
+        if doc_id not in documents and not any(e["output"] == old["output"] for e in documents.values()):
+            stale = os.path.join(output_dir, old["output"])
+            if os.path.exists(stale):
+                os.remove(stale)
+            stats["removed"] += 1
+
+    stats["documents"] = len(documents)
+    _write_atomic(manifest_path, json.dumps({"documents": documents}, indent=2))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert research PDFs and Markdown notes to normalized Markdown.")
+    parser.add_argument("inputs", nargs="*", default=list(DEFAULT_INPUTS), help="PDF/Markdown files or glob patterns")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="directory for the Markdown corpus")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="per-page extraction cache")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: all CPUs)")
+    args = parser.parse_args(argv)
+
+    inputs = expand_inputs(args.inputs)
+    if not inputs:
+        parser.error("no PDF or Markdown inputs found")
+    stats = ingest(inputs, args.output, args.cache, args.workers)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
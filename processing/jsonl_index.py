@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+SUFFIX = ".idx"
+REQUIRED_FIELDS = ("question", "answer", "source")
+BLOCK_SIZE = 16 << 20
+
+
+def index_path(path):
+    return str(path) + SUFFIX
+
+
+def build_index(path):
+    """Write `<path>.idx`: uint64 byte offsets of every row start, plus the file size as a final entry."""
+    offsets = [np.zeros(1, dtype=np.uint64)]
+    position = 0
+    with open(path, "rb") as f:
+        while block := f.read(BLOCK_SIZE):
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord("\n"))
+            offsets.append((newlines + position + 1).astype(np.uint64))
+            position += len(block)
+    offsets = np.concatenate(offsets)
+    if offsets[-1] != position:
+        # Last row has no trailing newline
+        offsets = np.append(offsets, np.uint64(position))
+    offsets.tofile(index_path(path))
+    return offsets
+
+
+def load_index(path):
+    """Memory-map the offset index, rebuilding it when missing or out of date with the data file."""
+    idx = index_path(path)
+    size = os.path.getsize(path)
+    if os.path.exists(idx) and os.path.getmtime(idx) >= os.path.getmtime(path) and os.path.getsize(idx) >= 8:
+        offsets = np.memmap(idx, dtype=np.uint64, mode="r")
+        if offsets[-1] == size:
+            return offsets
+    return build_index(path)
+
+
+def validate_record(record):
+    """Schema problems with one Q&A record (extra keys such as seed_id are allowed).
+
+    `timestamp` is optional: chunk-derived rows carry an empty one, so it is only
+    checked for ISO 8601 when a value is present.
+    """
+    if not isinstance(record, dict):
+        return ["row is not a JSON object"]
+    errors = []
+    for field in REQUIRED_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors.append(f"{field} missing or empty")
+    timestamp = record.get("timestamp")
+    if timestamp is not None and not isinstance(timestamp, str):
+        errors.append("timestamp is not a string")
+    elif timestamp and timestamp.strip():
+        try:
+            datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        except ValueError:
+            errors.append(f"timestamp {timestamp!r} is not ISO 8601")
+    return errors
+
+
+class JsonlIndex:
+    """O(1) random access to rows of a JSONL file through its offset index."""
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = load_index(path)
+        self._file = open(path, "rb")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def line(self, row):
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        row %= len(self)
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        self._file.seek(start)
+        return self._file.read(end - start)
+
+    def __getitem__(self, row):
+        return json.loads(self.line(row))
+
+    def sample(self, k, seed=None):
+        """k distinct rows chosen uniformly at random, as (row, record) pairs."""
+        rows = sorted(random.Random(seed).sample(range(len(self)), min(k, len(self))))
+        return [(row, self[row]) for row in rows]
+
+
+def _scan_range(task):
+    # Runs in a worker: parse rows [start_row, ...) from the byte range [start, end)
+    path, start_row, start, end, keep_records, max_errors = task
+    records = [] if keep_records else None
+    errors = []
+    rows = invalid = 0
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    for row, line in enumerate(data.split(b"\n"), start_row):
+        if not line.strip():
+            continue
+        rows += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            problems = [f"invalid JSON: {exc.msg}"]
+        else:
+            problems = validate_record(record)
+        if problems:
+            invalid += 1
+            if len(errors) < max_errors:
+                errors.append({"row": row, "errors": problems})
+        elif keep_records:
+            records.append(record)
+    return {"rows": rows, "invalid": invalid, "errors": errors, "records": records}
+
+
+def scan(path, workers=None, keep_records=False, chunks_per_worker=4, max_errors=100):
+    """Parse and validate a JSONL file in parallel, split at row boundaries via its offset index.
+
+    Returns a summary with row and invalid counts and the first `max_errors`
+    problems; with `keep_records`, also the valid records in file order.
+    """
+    offsets = load_index(path)
+    n_rows = len(offsets) - 1
+    workers = workers or os.cpu_count() or 1
+    n_chunks = max(1, min(n_rows, workers * chunks_per_worker))
+    bounds = [k * n_rows // n_chunks for k in range(n_chunks + 1)]
+    tasks = [
+        (str(path), a, int(offsets[a]), int(offsets[b]), keep_records, max_errors)
+        for a, b in zip(bounds, bounds[1:])
+        if b > a
+    ]
+
+    summary = {"rows": 0, "invalid": 0, "errors": [], "records": [] if keep_records else None}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(_scan_range, tasks):
+            summary["rows"] += part["rows"]
+            summary["invalid"] += part["invalid"]
+            summary["errors"].extend(part["errors"][:max_errors - len(summary["errors"])])
+            if keep_records:
+                summary["records"].extend(part["records"])
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offset index, random access and parallel validation for JSONL datasets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="(re)build the .idx offset index")
+    build.add_argument("path")
+    get = sub.add_parser("get", help="print one row")
+    get.add_argument("path")
+    get.add_argument("row", type=int)
+    sample = sub.add_parser("sample", help="print k random rows")
+    sample.add_argument("path")
+    sample.add_argument("-k", type=int, default=5)
+    sample.add_argument("--seed", type=int, default=None)
+    validate = sub.add_parser("validate", help="check every row against the Q&A schema in parallel")
+    validate.add_argument("path")
+    validate.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(f"Indexed {len(build_index(args.path)) - 1} rows into '{index_path(args.path)}'.")
+    elif args.command == "get":
+        with JsonlIndex(args.path) as index:
+            print(json.dumps(index[args.row], ensure_ascii=False, indent=2))
+    elif args.command == "sample":
+        with JsonlIndex(args.path) as index:
+            for row, record in index.sample(args.k, args.seed):
+                print(row, json.dumps(record, ensure_ascii=False))
+    else:
+        summary = scan(args.path, args.workers)
+        for error in summary["errors"]:
+            print(f"row {error['row']}: {'; '.join(error['errors'])}")
+        print(f"{summary['rows']} rows checked, {summary['invalid']} invalid.")
+        if summary["invalid"]:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# Theme, hypothesis and theory labels of the synthetic Q&A data. qa.py builds its
+# questions from them and the frontend's research_db.py recovers them from rows,
+# loading this file by path, so keep it to plain literals with no imports.
+
+# Core themes and hypotheses
+core_themes = [
+    "PILAR model (Prospects, Involved, Liked, Agency, Respect)",
+    "Prosocial evolution and sub-group level selection (sGLS)",
+    "Inequality aversion in collaboration",
+    "Thorngate’s Postulate of Commensurate Complexity",
+    "Deep Research Agent (DRA) for practical application",
+    "Egalitarian behavior and cultural transformation",
+    "Positive-sum vs. zero-sum dynamics"
+]
+hypotheses = [
+    "Teaching PILAR/EUCRM increases prosocial orientation and group viability, mediated by pillar awareness, especially in low-empathy individuals.",
+    "High inequality aversion predicts elevated Respect/Involved perceptions and prosocial engagement, moderating zero-sum avoidance.",
+    "Egalitarian structures boost liking/respect/communication but reduce agency/confidence, affecting adaptability in resource-scarce ecologies.",
+    "Low prosociality (low QoL/EQ) causes reticence in prosocial learning, requiring ancestral norm priming for engagement.",
+    "Hierarchy steepness balances confidence/performance vs. trio (health), optimal in actualization hierarchies."
+]
+theories = [
+    "Social Identity Theory (SIT)",
+    "Social Network Analysis (SNA)",
+    "Psychological Safety",
+    "Field Theory (Lewin)",
+    "Cognitive Dissonance (Festinger)",
+    "Inequity Aversion (de Waal)"
+]
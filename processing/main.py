@@ -0,0 +1,239 @@
+"""Run the whole data pipeline as a DAG of cached stages.
+
+    python main.py                        # ingest -> chunk -> bm25 -> ground -> generate -> curate -> export
+    python main.py --with-services        # also embed/upsert into ChromaDB and amplify through the LLM endpoint
+    python main.py --only generate        # one stage plus whatever it depends on
+    python main.py --force curate         # rerun a stage even if its cache key matches
+
+Every stage is a command with declared inputs, code files and outputs. Its
+cache key hashes the command with the contents of its inputs and code; a stage
+whose key matches the last successful run, and whose outputs are untouched
+since, is skipped. Stages whose dependencies are done run concurrently. Build
+artifacts go to build/, stage logs to build/logs/ and timings to
+build/pipeline-report.json.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+BUILD = HERE / "build"
+STATE = HERE / ".cache" / "pipeline.json"
+PY = sys.executable
+
+
+class Stage:
+    """A command plus the files it reads (`inputs`, `code`) and writes (`outputs`), run after `after`."""
+
+    def __init__(self, name, cmd, inputs=(), code=(), outputs=(), after=(), cwd=HERE, env=None):
+        self.name = name
+        self.cmd = [str(part) for part in cmd]
+        self.inputs = [Path(p) for p in inputs]
+        self.code = [Path(p) for p in code]
+        self.outputs = [Path(p) for p in outputs]
+        self.after = list(after)
+        self.cwd = cwd
+        self.env = env or {}
+
+
+def build_stages(with_services=False):
+    corpus, chunks, bm25 = BUILD / "corpus", BUILD / "chunks.jsonl", BUILD / "bm25"
+    grounding, generated = BUILD / "grounding.json", BUILD / "qa.jsonl"
+    amplified, curated = BUILD / "amplified.jsonl", BUILD / "curated.jsonl"
+    vector = ROOT / "vector"
+    stages = [
+        Stage("ingest", [PY, "ingest.py", "-o", corpus],
+              inputs=[ROOT / "apriori-research" / "papers", ROOT / "apriori-research" / "extracted_insights"],
+              code=["ingest.py"], outputs=[corpus]),
+        Stage("chunk", [PY, "chunker.py", "--corpus", corpus, "--text", "--window-words", "256", "-o", chunks],
+              inputs=[corpus], code=["chunker.py", "ingest.py"], outputs=[chunks], after=["ingest"]),
+        Stage("bm25", [PY, "-m", "vector.bm25", "build", chunks, "-o", bm25],
+              inputs=[chunks], code=[vector / "bm25.py", vector / "chromadb.py"], outputs=[bm25], after=["chunk"], cwd=ROOT),
+        Stage("ground", [PY, "grounding.py", "--index", bm25, "--corpus", corpus, "-o", grounding, "--force"],
+              inputs=[bm25, corpus], code=["grounding.py", "qa.py", "labels.py", vector / "bm25.py"], outputs=[grounding], after=["bm25"],
+              env={"PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}),
+        Stage("generate", [PY, "qa.py", "--grounding", grounding, "-o", generated],
+              inputs=[grounding], code=["qa.py", "labels.py", "combinations.py", "fingerprints.py"],
+              outputs=[generated, f"{generated}.fp"], after=["ground"]),
+    ]
+    curate_input = generated
+    if with_services:
+        stages += [
+            Stage("embed", [PY, "-m", "vector.chromadb", "index", chunks, "--prune-sources"],
+                  inputs=[chunks], code=[vector / "chromadb.py", vector / "embeddings.py", vector / "embedcache.py"],
+                  outputs=[vector / "chroma"], after=["chunk"], cwd=ROOT),
+            Stage("amplify", [PY, "amplify.py", generated, "-o", amplified],
+                  inputs=[generated, f"{generated}.fp"], code=["amplify.py", "fingerprints.py"],
+                  outputs=[amplified, f"{amplified}.done"], after=["generate"]),
+        ]
+        curate_input = amplified
+    stages += [
+        Stage("curate", [PY, "curate.py", curate_input, "-o", curated],
+              inputs=[curate_input], code=["curate.py", "dedup.py"], outputs=[curated],
+              after=["amplify" if with_services else "generate"]),
+        Stage("validate", [PY, "jsonl_index.py", "validate", curated],
+              inputs=[curated], code=["jsonl_index.py"], outputs=[f"{curated}.idx"], after=["curate"]),
+        Stage("export", [PY, "qastore.py", "encode", curated, BUILD / "curated.qas"],
+              inputs=[curated], code=["qastore.py"], outputs=[BUILD / "curated.qas"], after=["curate"]),
+    ]
+    return stages
+
+
+def _files(path):
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if p.is_file())
+    return [path] if path.exists() else []
+
+
+def file_hash(path, memo):
+    """SHA-256 of a file, reused from `memo` while its size and mtime are unchanged."""
+    stat = path.stat()
+    signature = [stat.st_size, stat.st_mtime_ns]
+    entry = memo.get(str(path))
+    if entry and entry["signature"] == signature:
+        return entry["sha256"]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    memo[str(path)] = {"signature": signature, "sha256": h.hexdigest()}
+    return memo[str(path)]["sha256"]
+
+
+def cache_key(stage, memo):
+    h = hashlib.sha256(json.dumps(stage.cmd).encode("utf-8"))
+    for path in stage.inputs + [stage.cwd / p for p in stage.code]:
+        files = _files(path)
+        if not files:
+            h.update(f"missing:{path}".encode("utf-8"))
+        for f in files:
+            h.update(f"{f}\0{file_hash(f, memo)}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def output_signature(stage):
+    """Cheap fingerprint of a stage's outputs (paths, sizes, mtimes), or None if any is missing."""
+    signature = []
+    for path in stage.outputs:
+        files = _files(path)
+        if not files:
+            return None
+        signature += [[str(f), f.stat().st_size, f.stat().st_mtime_ns] for f in files]
+    return signature
+
+
+def run_stage(stage):
+    log_path = BUILD / "logs" / f"{stage.name}.log"
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        env = {**os.environ, **{k: str(v) for k, v in stage.env.items()}} if stage.env else None
+        result = subprocess.run(stage.cmd, cwd=stage.cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return result.returncode, time.perf_counter() - start
+
+
+def select(stages, only):
+    """`only` and everything it depends on, in declaration order."""
+    by_name = {s.name: s for s in stages}
+    unknown = set(only) - set(by_name)
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}; choose from {', '.join(by_name)}")
+    wanted, todo = set(), list(only)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(d for d in by_name[name].after if d in by_name)
+    return [s for s in stages if s.name in wanted]
+
+
+def run_pipeline(stages, jobs=None, force=()):
+    """Run `stages` respecting their `after` edges; returns one report entry per stage."""
+    BUILD.mkdir(exist_ok=True)
+    (BUILD / "logs").mkdir(exist_ok=True)
+    STATE.parent.mkdir(exist_ok=True)
+    state = json.loads(STATE.read_text(encoding="utf-8")) if STATE.exists() else {}
+    memo = state.setdefault("files", {})
+    cached = state.setdefault("stages", {})
+    names = {s.name for s in stages}
+    pending = {s.name: s for s in stages}
+    report, done, failed = {}, set(), set()
+
+    def ready(stage):
+        deps = [d for d in stage.after if d in names]
+        return all(d in done for d in deps), any(d in failed for d in deps)
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        running = {}
+        while pending or running:
+            for name, stage in list(pending.items()):
+                is_ready, blocked = ready(stage)
+                if blocked:
+                    report[name] = {"stage": name, "status": "blocked", "seconds": 0.0}
+                    failed.add(name)
+                    del pending[name]
+                elif is_ready:
+                    del pending[name]
+                    key = cache_key(stage, memo)
+                    previous = cached.get(name, {})
+                    if name not in force and previous.get("key") == key and previous.get("outputs") == output_signature(stage):
+                        report[name] = {"stage": name, "status": "cached", "seconds": 0.0}
+                        done.add(name)
+                        continue
+                    running[pool.submit(run_stage, stage)] = (stage, key)
+            if not running:
+                if pending and not any(ready(stage)[0] or ready(stage)[1] for stage in pending.values()):
+                    raise SystemExit(f"Dependency cycle among stages: {', '.join(pending)}")
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, key = running.pop(future)
+                returncode, seconds = future.result()
+                ok = returncode == 0
+                report[stage.name] = {"stage": stage.name, "status": "ran" if ok else "failed", "seconds": round(seconds, 3)}
+                if ok:
+                    cached[stage.name] = {"key": key, "outputs": output_signature(stage)}
+                    done.add(stage.name)
+                else:
+                    cached.pop(stage.name, None)
+                    failed.add(stage.name)
+                    print(f"Stage {stage.name} failed (exit {returncode}); see {BUILD / 'logs' / (stage.name + '.log')}")
+            # Save after every stage so an interrupted run keeps what finished
+            STATE.write_text(json.dumps(state), encoding="utf-8")
+    STATE.write_text(json.dumps(state), encoding="utf-8")
+    return [report[s.name] for s in stages]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ingest-to-export pipeline with per-stage caching.")
+    parser.add_argument("--with-services", action="store_true", help="include stages that need the embedding/LLM endpoints")
+    parser.add_argument("--only", nargs="+", default=None, help="run these stages and their dependencies")
+    parser.add_argument("--force", nargs="+", default=(), help="rerun these stages regardless of cache")
+    parser.add_argument("--jobs", type=int, default=None, help="stages run at once (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    stages = build_stages(args.with_services)
+    if args.only:
+        stages = select(stages, args.only)
+    start = time.perf_counter()
+    report = run_pipeline(stages, args.jobs, set(args.force))
+    total = time.perf_counter() - start
+
+    for entry in report:
+        print(f"{entry['stage']:>10}  {entry['status']:<7}  {entry['seconds']:>8.2f}s")
+    print(f"{'total':>10}  {'':<7}  {total:>8.2f}s")
+    with open(BUILD / "pipeline-report.json", "w", encoding="utf-8") as f:
+        json.dump({"seconds": round(total, 3), "stages": report}, f, indent=2)
+    if any(entry["status"] in ("failed", "blocked") for entry in report):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
-# Process PDF
-from llama-index.readers.pdf import PDFReader
+# Process PDF and Markdown sources into the normalized corpus; see ingest.py
+from ingest import main
 
-
-
-# Process Markdown
\ No newline at end of file
+if __name__ == "__main__":
+    main()
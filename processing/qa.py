@@ -1,92 +1,301 @@
+import argparse
+import hashlib
 import json
-import uuid
-from datetime import datetime
-
-# Core themes and hypotheses
-core_themes = [
-    "PILAR model (Prospects, Involved, Liked, Agency, Respect)",
-    "Prosocial evolution and sub-group level selection (sGLS)",
-    "Inequality aversion in collaboration",
-    "Thorngate’s Postulate of Commensurate Complexity",
-    "Deep Research Agent (DRA) for practical application",
-    "Egalitarian behavior and cultural transformation",
-    "Positive-sum vs. zero-sum dynamics"
-]
-hypotheses = [
-    "Teaching PILAR/EUCRM increases prosocial orientation and group viability, mediated by pillar awareness, especially in low-empathy individuals.",
-    "High inequality aversion predicts elevated Respect/Involved perceptions and prosocial engagement, moderating zero-sum avoidance.",
-    "Egalitarian structures boost liking/respect/communication but reduce agency/confidence, affecting adaptability in resource-scarce ecologies.",
-    "Low prosociality (low QoL/EQ) causes reticence in prosocial learning, requiring ancestral norm priming for engagement.",
-    "Hierarchy steepness balances confidence/performance vs. trio (health), optimal in actualization hierarchies."
-]
-theories = [
-    "Social Identity Theory (SIT)",
-    "Social Network Analysis (SNA)",
-    "Psychological Safety",
-    "Field Theory (Lewin)",
-    "Cognitive Dissonance (Festinger)",
-    "Inequity Aversion (de Waal)"
-]
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from combinations import CombinationSpace
+from fingerprints import combine, digest, read_index, row_fingerprint, sidecar_path, write_index
+from labels import core_themes, hypotheses, theories
+
+# Data sources to draw from
 sources = [
     "hypothesese2.md", "technology-collaboration.md", "hypothese1.md",
     "abstract.md", "A-Model-Of-Collaboration.pdf"
 ]
 
-# Function to generate Q&A pairs with authors' style
-def generate_qa_pairs():
-    qa_pairs = []
-    timestamp = "2025-10-20T12:13:00Z"  # 11:13 PM ACDT = 12:13 PM UTC
-
-    for i in range(3000):
-        # Generate unique question ID and base structure
-        q_id = f"Q{i+1}"
-        theme = core_themes[i % len(core_themes)]
-        hypo = hypotheses[i % len(hypotheses)]
-        theory = theories[i % len(theories)]
-        source = sources[i % len(sources)]
-
-        # Construct question with scholarly tone and hypothesis focus
-        question_types = [
-            f"How might {theme} enhance collaboration viability in light of {hypo}?",
-            f"What role does {theory} play in validating {hypo} within {theme}?",
-            f"Can {theme} address the challenge posed by {hypo}, drawing on {theory}?",
-            f"To what extent does {hypo} influence the efficacy of {theme}, per {theory}?"
+# Level of Abstraction
+abstraction = ["Strategic: Vision-level", "Operational: Project-Level", "Tactical: Task-level"]
+abstraction_framing = {
+    "Strategic: Vision-level": "At a strategic, vision level",
+    "Operational: Project-Level": "At an operational, project level",
+    "Tactical: Task-level": "At a tactical, task level"
+}
+
+# Question templates with scholarly tone and hypothesis focus
+question_types = [
+    "How might {theme} enhance collaboration viability in light of {hypo}?",
+    "What role does {theory} play in validating {hypo} within {theme}?",
+    "Can {theme} address the challenge posed by {hypo}, drawing on {theory}?",
+    "To what extent does {hypo} influence the efficacy of {theme}, per {theory}?"
+]
+
+# Answer fragments with authors' optimistic yet cautious style, keyed by core theme
+answer_base = {
+    "PILAR model (Prospects, Involved, Liked, Agency, Respect)": "The PILAR model, with its five pillars and 20 interlinked forces, offers a promising synthesis of over 30 SGP theories, potentially enhancing collaboration viability if applied through idealized conditions.",
+    "Prosocial evolution and sub-group level selection (sGLS)": "Prosocial evolution, driven by sGLS, suggests an exponential advantage in hominin collaboration, rooted in savannah ecology, though empirical validation remains a future endeavor.",
+    "Inequality aversion in collaboration": "Inequality aversion, a cornerstone of prosociality, punishes unfairness and fosters Respect, yet its impact may wane in hierarchical settings unless mitigated by DRA.",
+    "Thorngate’s Postulate of Commensurate Complexity": "Thorngate’s Postulate highlights the trade-off between generality, accuracy, and simplicity in PILAR, necessitating AI agents like DRA to bridge this complexity gap.",
+    "Deep Research Agent (DRA) for practical application": "The DRA, powered by LLMs, acts as an empathetic coach, translating PILAR’s complexity into actionable guidance, though its efficacy hinges on bias mitigation.",
+    "Egalitarian behavior and cultural transformation": "Egalitarian behavior stabilizes groups via the communication-respect-liking trio, yet may stifle Agency, a tension we believe can be balanced with careful design.",
+    "Positive-sum vs. zero-sum dynamics": "Positive-sum dynamics build CA through trust, countering zero-sum reticence, a challenge we see as addressable with ancestral norm priming."
+}
+theory_insight = {
+    "Social Identity Theory (SIT)": "SIT underscores how Liked perceptions shape ingroup cohesion, aligning with PILAR’s evolutionary adaptive mechanisms.",
+    "Social Network Analysis (SNA)": "SNA reveals network centrality’s role in Involved perceptions, supporting PILAR’s force dynamics.",
+    "Psychological Safety": "Psychological safety fosters Agency, a pillar we deem critical for innovation within PILAR.",
+    "Field Theory (Lewin)": "Lewin’s field theory informs Prospects as a function of social forces, a concept we integrate into PILAR’s structure.",
+    "Cognitive Dissonance (Festinger)": "Festinger’s dissonance explains Agency’s impact on Liked, a nuance we explore for collaboration resistance.",
+    "Inequity Aversion (de Waal)": "de Waal’s inequity aversion links to Respect, reinforcing PILAR’s prosocial foundation."
+}
+
+TIMESTAMP = "2025-10-20T12:13:00Z"  # 11:13 PM ACDT = 12:13 PM UTC
+DEFAULT_ROWS = 3000
+DEFAULT_OUTPUT = "synthetic_qa_phi4.jsonl"
+
+
+def combination_space(seed=None):
+    """Index over themes x hypotheses x theories x sources x question types x abstraction levels."""
+    return CombinationSpace(
+        (len(core_themes), len(hypotheses), len(theories), len(sources), len(question_types), len(abstraction)),
+        seed=seed,
+    )
+
+
+def build_tables():
+    """Render answers once per (theme, theory) and framed question templates once per (type, level)."""
+    answers = {
+        (theme, theory): f"{answer_base[theme]} We contend that {theory_insight[theory]} offers a robust lens, though further empirical testing is prudent to affirm these insights."
+        for theme in core_themes
+        for theory in theories
+    }
+    templates = {
+        (q, level): f"{abstraction_framing[level]}, {template[0].lower()}{template[1:]}"
+        for q, template in enumerate(question_types)
+        for level in abstraction
+    }
+    return answers, templates
+
+
+def load_contexts(path):
+    """{(theme, hypothesis, theory, source): passage} from a table written by grounding.py."""
+    with open(path, encoding="utf-8") as f:
+        table = json.load(f)
+    return {(r["theme"], r["hypothesis"], r["theory"], r["source"]): r["passage"] for r in table["contexts"]}
+
+
+def build_row(i, digits, answers, templates, contexts=None):
+    t, h, th, s, q, a = digits
+    theme = core_themes[t]
+    hypo = hypotheses[h]
+    theory = theories[th]
+
+    question = templates[q, abstraction[a]].format(theme=theme, hypo=hypo, theory=theory)
+    answer = answers[theme, theory]
+    passage = contexts.get((theme, hypo, theory, sources[s])) if contexts else None
+    if passage:
+        answer = f'{answer} Supporting evidence from {sources[s]}: "{passage}"'
+
+    return {
+        "question": f"Q{i+1}: {question}",
+        "answer": answer,
+        "source": sources[s],
+        "timestamp": TIMESTAMP
+    }
+
+
+# Stream Q&A pairs with authors' style, one record at a time
+def iter_qa_pairs(n_pairs=DEFAULT_ROWS, start=0, seed=None, contexts=None):
+    """Yield pairs for row indices [start, n_pairs); any sub-range matches the same rows of a full run.
+
+    Row i is built from combination i of `combination_space(seed)`, so no combination
+    repeats until all of them have been used. With `contexts` (see `load_contexts`),
+    each answer quotes the passage retrieved for its theme, hypothesis, theory and source.
+    """
+    answers, templates = build_tables()
+    space = combination_space(seed)
+
+    for i in range(start, n_pairs):
+        yield build_row(i, space.digits(i), answers, templates, contexts)
+
+
+def iter_fingerprints(n_pairs=DEFAULT_ROWS, start=0, seed=None, contexts=None):
+    """Digest of exactly the input strings row i is built from (its Qn position is not included)."""
+    answers, templates = build_tables()
+    space = combination_space(seed)
+    theme_fp, hypo_fp, theory_fp, source_fp = (
+        [digest(value) for value in values] for values in (core_themes, hypotheses, theories, sources)
+    )
+    template_fp = {key: digest(value) for key, value in templates.items()}
+    answer_fp = {key: digest(value) for key, value in answers.items()}
+    timestamp_fp = digest(TIMESTAMP)
+
+    for i in range(start, n_pairs):
+        t, h, th, s, q, a = space.digits(i)
+        parts = [
+            theme_fp[t], hypo_fp[h], theory_fp[th], source_fp[s],
+            template_fp[q, abstraction[a]], answer_fp[core_themes[t], theories[th]], timestamp_fp,
         ]
-        question = f"{q_id}: {question_types[i % len(question_types)]}"
-
-        # Construct answer with authors' optimistic yet cautious style
-        answer_base = {
-            "PILAR model": "The PILAR model, with its five pillars and 20 interlinked forces, offers a promising synthesis of over 30 SGP theories, potentially enhancing collaboration viability if applied through idealized conditions.",
-            "Prosocial evolution and sGLS": "Prosocial evolution, driven by sGLS, suggests an exponential advantage in hominin collaboration, rooted in savannah ecology, though empirical validation remains a future endeavor.",
-            "Inequality aversion in collaboration": "Inequality aversion, a cornerstone of prosociality, punishes unfairness and fosters Respect, yet its impact may wane in hierarchical settings unless mitigated by DRA.",
-            "Thorngate’s Postulate": "Thorngate’s Postulate highlights the trade-off between generality, accuracy, and simplicity in PILAR, necessitating AI agents like DRA to bridge this complexity gap.",
-            "Deep Research Agent (DRA)": "The DRA, powered by LLMs, acts as an empathetic coach, translating PILAR’s complexity into actionable guidance, though its efficacy hinges on bias mitigation.",
-            "Egalitarian behavior and cultural transformation": "Egalitarian behavior stabilizes groups via the communication-respect-liking trio, yet may stifle Agency, a tension we believe can be balanced with careful design.",
-            "Positive-sum vs. zero-sum dynamics": "Positive-sum dynamics build CA through trust, countering zero-sum reticence, a challenge we see as addressable with ancestral norm priming."
-        }
-        theory_insight = {
-            "Social Identity Theory (SIT)": "SIT underscores how Liked perceptions shape ingroup cohesion, aligning with PILAR’s evolutionary adaptive mechanisms.",
-            "Social Network Analysis (SNA)": "SNA reveals network centrality’s role in Involved perceptions, supporting PILAR’s force dynamics.",
-            "Psychological Safety": "Psychological safety fosters Agency, a pillar we deem critical for innovation within PILAR.",
-            "Field Theory (Lewin)": "Lewin’s field theory informs Prospects as a function of social forces, a concept we integrate into PILAR’s structure.",
-            "Cognitive Dissonance (Festinger)": "Festinger’s dissonance explains Agency’s impact on Liked, a nuance we explore for collaboration resistance.",
-            "Inequity Aversion (de Waal)": "de Waal’s inequity aversion links to Respect, reinforcing PILAR’s prosocial foundation."
-        }
-        answer = f"{answer_base[theme]} We contend that {theory_insight[theory]} offers a robust lens, though further empirical testing is prudent to affirm these insights."
-
-        qa_pairs.append({
-            "question": question,
-            "answer": answer,
-            "source": source,
-            "timestamp": timestamp
-        })
-
-    return qa_pairs
-
-# Generate and write to .jsonl file
-qa_data = generate_qa_pairs()
-with open("synthetic_qa_phi4.jsonl", "w", encoding="utf-8") as f:
-    for item in qa_data:
-        f.write(json.dumps(item, ensure_ascii=False) + "\n")
-
-print("File 'synthetic_qa_phi4.jsonl' has been created with 3000 Q&A pairs.")
\ No newline at end of file
+        if contexts is not None:
+            parts.append(digest(contexts.get((core_themes[t], hypotheses[h], theories[th], sources[s]), "")))
+        yield combine(*parts)
+
+
+# Function to generate Q&A pairs with authors' style
+def generate_qa_pairs(n_pairs=DEFAULT_ROWS, seed=None, contexts=None):
+    return list(iter_qa_pairs(n_pairs, seed=seed, contexts=contexts))
+
+
+def write_jsonl(records, path, flush_every=10_000, buffer_size=1 << 20):
+    """Write records to a JSONL file through a large write buffer, flushing every `flush_every` rows."""
+    count = 0
+    with open(path, "w", encoding="utf-8", buffering=buffer_size) as f:
+        for item in records:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            count += 1
+            if count % flush_every == 0:
+                f.flush()
+    return count
+
+
+def write_incremental(n_pairs, output, seed=None, flush_every=10_000, contexts=None):
+    """Rewrite `output`, regenerating only rows whose input fingerprint changed since the last run.
+
+    Unchanged rows are copied byte for byte from the previous file, guided by its
+    `.fp` sidecar. Indices of regenerated rows go to `<output>.changed` so later
+    stages (see amplify.py) can redo just those.
+    """
+    index_path = sidecar_path(output)
+    old_index = read_index(index_path) if os.path.exists(output) else None
+    answers, templates = build_tables()
+    space = combination_space(seed)
+    changed = 0
+
+    old = open(output, "rb") if old_index is not None else None
+    try:
+        with open(output + ".tmp", "wb", buffering=1 << 20) as new, \
+                open(index_path + ".tmp", "wb") as fps, \
+                open(output + ".changed", "w", encoding="utf-8") as changes:
+            for i, fp in enumerate(iter_fingerprints(n_pairs, seed=seed, contexts=contexts)):
+                line = old.readline() if old else b""
+                if line.endswith(b"\n") and row_fingerprint(old_index, i) == fp:
+                    new.write(line)
+                else:
+                    record = build_row(i, space.digits(i), answers, templates, contexts)
+                    new.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                    changes.write(f"{i}\n")
+                    changed += 1
+                fps.write(fp)
+                if (i + 1) % flush_every == 0:
+                    new.flush()
+    finally:
+        if old:
+            old.close()
+
+    os.replace(output + ".tmp", output)
+    os.replace(index_path + ".tmp", index_path)
+    return changed
+
+
+def file_sha256(*paths, chunk_size=1 << 20):
+    """SHA-256 of the concatenation of one or more files."""
+    sha = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+
+def shard_ranges(n_pairs, n_shards):
+    """Split [0, n_pairs) into n_shards contiguous, deterministic index ranges."""
+    return [(k * n_pairs // n_shards, (k + 1) * n_pairs // n_shards) for k in range(n_shards)]
+
+
+def shard_path(output, index, n_shards):
+    output = Path(output)
+    return output.with_name(f"{output.stem}-{index:05d}-of-{n_shards:05d}{output.suffix}")
+
+
+def _write_shard(task):
+    # Runs in a worker process; module-level so it can be pickled
+    path, start, stop, seed, flush_every, grounding = task
+    contexts = load_contexts(grounding) if grounding else None
+    rows = write_jsonl(iter_qa_pairs(stop, start=start, seed=seed, contexts=contexts), path, flush_every=flush_every)
+    write_index(sidecar_path(path), iter_fingerprints(stop, start=start, seed=seed, contexts=contexts))
+    return {
+        "path": Path(path).name,
+        "fingerprints": Path(sidecar_path(path)).name,
+        "start": start,
+        "stop": stop,
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "sha256": file_sha256(path),
+    }
+
+
+def write_shards(n_pairs, output, n_shards, workers=None, seed=None, flush_every=10_000, grounding=None):
+    """Generate n_pairs across n_shards JSONL files on a process pool and write a manifest.
+
+    Concatenating the shards in index order reproduces the serial output byte for byte;
+    the manifest records per-shard row counts and checksums plus the checksum of that
+    concatenation. Each shard gets its own fingerprint sidecar next to it.
+    """
+    tasks = [
+        (str(shard_path(output, k, n_shards)), start, stop, seed, flush_every, grounding)
+        for k, (start, stop) in enumerate(shard_ranges(n_pairs, n_shards))
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        shards = list(pool.map(_write_shard, tasks))
+
+    manifest = {
+        "rows": sum(shard["rows"] for shard in shards),
+        "num_shards": n_shards,
+        "seed": seed,
+        "sha256": file_sha256(*(path for path, *_ in tasks)),
+        "shards": shards,
+    }
+    manifest_path = Path(output).with_suffix(".manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path, manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic PILAR/EUCRM Q&A seed pairs as JSONL.")
+    parser.add_argument("-n", "--rows", type=int, default=DEFAULT_ROWS, help="number of Q&A pairs to generate")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="output JSONL path")
+    parser.add_argument("--flush-every", type=int, default=10_000, help="flush the output file every N rows")
+    parser.add_argument("--seed", type=int, default=None, help="visit combinations in a seeded pseudo-random order")
+    parser.add_argument("--incremental", action="store_true", help="only regenerate rows whose inputs changed since the last run")
+    parser.add_argument("--shards", type=int, default=0, help="split output into N shard files generated in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size for sharded runs (default: CPU count)")
+    parser.add_argument("--grounding", default=None, help="passage table from grounding.py to quote in answers")
+    args = parser.parse_args(argv)
+    contexts = load_contexts(args.grounding) if args.grounding else None
+
+    space_size = len(combination_space())
+    if args.rows > space_size:
+        print(f"Note: only {space_size} distinct combinations exist; rows beyond that repeat them.")
+
+    if args.shards > 0:
+        manifest_path, manifest = write_shards(
+            args.rows, args.output, args.shards, args.workers, args.seed, args.flush_every, args.grounding,
+        )
+        print(f"Wrote {manifest['rows']} Q&A pairs across {args.shards} shards; manifest at '{manifest_path}'.")
+        return
+
+    if args.incremental:
+        changed = write_incremental(args.rows, args.output, args.seed, args.flush_every, contexts)
+        print(f"File '{args.output}' has {args.rows} Q&A pairs; {changed} regenerated (listed in '{args.output}.changed').")
+        return
+
+    # Generate and stream to .jsonl file, with a fingerprint sidecar for later incremental runs
+    count = write_jsonl(iter_qa_pairs(args.rows, seed=args.seed, contexts=contexts), args.output, flush_every=args.flush_every)
+    write_index(sidecar_path(args.output), iter_fingerprints(args.rows, seed=args.seed, contexts=contexts))
+    print(f"File '{args.output}' has been created with {count} Q&A pairs.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import argparse
+import json
+import mmap
+import os
+import re
+from array import array
+
+import numpy as np
+
+MAGIC = b"QAS1"
+ALIGN = 8
+# A fragment runs up to and including a punctuation boundary (plus trailing spaces)
+FRAGMENT = re.compile(r"[^.?!,;:]*[.?!,;:]+\s*|[^.?!,;:]+")
+QUESTION_ID = re.compile(r"^Q([1-9]\d*): ")
+DEFAULT_FRAGMENTED = ("question", "answer")
+# Per-row value kinds of a "mixed" column
+STR, INT, NULL, JSON = range(4)
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def split_fragments(text):
+    return FRAGMENT.findall(text)
+
+
+class _StringTable:
+    """Interns strings and assigns them dense uint32 codes in first-seen order."""
+
+    def __init__(self):
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    def to_bytes(self):
+        blob = bytearray()
+        offsets = array("Q", [0])
+        for value in self.codes:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        return bytes(blob), offsets.tobytes()
+
+
+def _value_kind(value):
+    if isinstance(value, str):
+        return STR
+    if isinstance(value, int) and not isinstance(value, bool) and INT64_MIN <= value <= INT64_MAX:
+        return INT
+    return NULL if value is None else JSON
+
+
+def encode_jsonl(input_path, output_path, fragmented=DEFAULT_FRAGMENTED):
+    """Encode a JSONL file of flat records into a dictionary-encoded store.
+
+    Every column shares one string table. Columns listed in `fragmented` must hold
+    strings; they are split into sentence/clause fragments so answers assembled
+    from a few template pieces cost a handful of codes per row, and a leading `Qn: `
+    id on the question is stored as an integer column. Other columns are typed by
+    their values: "str" columns hold one code per row, "int" columns (such as
+    amplify.py's seed_id/variant) hold int64 values, and anything else is "mixed",
+    with a per-row kind, an int64 value for ints, and a string code for strings or
+    the JSON text of other values (null needs neither).
+    """
+    table = _StringTable()
+    schema = None
+    rows = 0
+    qids = array("q")
+    columns = {}
+
+    with open(input_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if schema is None:
+                schema = list(record)
+                for name in schema:
+                    columns[name] = {"codes": array("I"), "offsets": array("Q", [0])} if name in fragmented else {"codes": array("I"), "values": array("q"), "kinds": array("B")}
+            if list(record) != schema:
+                raise ValueError(f"row {rows}: keys {list(record)} do not match schema {schema}")
+
+            for name in schema:
+                value = record[name]
+                column = columns[name]
+                if "offsets" not in column:
+                    kind = _value_kind(value)
+                    column["kinds"].append(kind)
+                    column["values"].append(value if kind == INT else 0)
+                    if kind == STR:
+                        column["codes"].append(table.code(value))
+                    elif kind == JSON:
+                        column["codes"].append(table.code(json.dumps(value, ensure_ascii=False)))
+                    else:
+                        column["codes"].append(0)
+                    continue
+                if not isinstance(value, str):
+                    raise ValueError(f"row {rows}: fragmented field {name!r} is not a string")
+                if name == "question":
+                    match = QUESTION_ID.match(value)
+                    qids.append(int(match.group(1)) if match else -1)
+                    if match:
+                        value = value[match.end():]
+                column["codes"].extend(table.code(fragment) for fragment in split_fragments(value))
+                column["offsets"].append(len(column["codes"]))
+            rows += 1
+
+    schema = schema or []
+    sections = []
+    header = {"rows": rows, "schema": schema, "fragmented": [n for n in schema if n in fragmented], "types": {}, "sections": {}}
+
+    # Use the narrowest integer widths the data allows
+    code_dtype = "<u2" if len(table.codes) <= 0xFFFF else "<u4"
+    blob, offsets = table.to_bytes()
+    sections += [("strings", "u1", blob), ("string_offsets", "<u8", offsets)]
+    if "question" in header["fragmented"]:
+        sections.append(("question.qid", "<i8", qids.tobytes()))
+    for name in schema:
+        column = columns[name]
+        if "offsets" in column:
+            kind = "str"
+        else:
+            kinds = set(column["kinds"])
+            kind = "str" if kinds <= {STR} else "int" if kinds == {INT} else "mixed"
+        header["types"][name] = kind
+        if kind != "int":
+            sections.append((f"{name}.codes", code_dtype, np.frombuffer(column["codes"], dtype=np.uint32).astype(code_dtype).tobytes()))
+        if kind != "str":
+            sections.append((f"{name}.values", "<i8", column["values"].tobytes()))
+        if kind == "mixed":
+            sections.append((f"{name}.kinds", "u1", column["kinds"].tobytes()))
+        if "offsets" in column:
+            offset_dtype = "<u4" if column["offsets"][-1] <= 0xFFFFFFFF else "<u8"
+            sections.append((f"{name}.offsets", offset_dtype, np.frombuffer(column["offsets"], dtype=np.uint64).astype(offset_dtype).tobytes()))
+
+    # Lay sections out after the header, each aligned so numpy can view it in place
+    def layout(header_size):
+        position = len(MAGIC) + 8 + header_size
+        for name, dtype, data in sections:
+            position += -position % ALIGN
+            header["sections"][name] = {"offset": position, "dtype": dtype, "count": len(data) // np.dtype(dtype).itemsize}
+            position += len(data)
+        return json.dumps(header).encode("utf-8")
+
+    encoded = b""
+    while True:
+        candidate = layout(len(encoded))
+        if len(candidate) == len(encoded):
+            break
+        encoded = candidate
+    encoded = candidate
+
+    with open(output_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for name, _, data in sections:
+            f.write(b"\0" * (header["sections"][name]["offset"] - f.tell()))
+            f.write(data)
+    return rows
+
+
+class QAStore:
+    """Memory-mapped reader for files written by `encode_jsonl`.
+
+    Columns are numpy views straight into the mapping, so opening is O(header) and
+    scans such as `np.bincount(store.codes("source"))` never touch JSON.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a QA store")
+        size = int.from_bytes(self._mm[len(MAGIC):len(MAGIC) + 8], "little")
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._mm[start:start + size].decode("utf-8"))
+        self.schema = self.header["schema"]
+        self._fragmented = set(self.header["fragmented"])
+        self.types = {name: self.header.get("types", {}).get(name, "str") for name in self.schema}
+        self._sections = {
+            name: np.frombuffer(self._mm, dtype=info["dtype"], count=info["count"], offset=info["offset"])
+            for name, info in self.header["sections"].items()
+        }
+        self._string_offsets = self._sections["string_offsets"]
+        self._strings_start = self.header["sections"]["strings"]["offset"]
+        self._strings = {}
+
+    def close(self):
+        self._sections = self._string_offsets = None
+        self._file.close()
+        try:
+            self._mm.close()
+        except BufferError:
+            # Arrays from `codes()` still view the mapping; it is unmapped when the last one is freed
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.header["rows"]
+
+    def string(self, code):
+        """Decode one entry of the shared string table (decoded entries are kept for reuse)."""
+        value = self._strings.get(code)
+        if value is None:
+            start = self._strings_start + int(self._string_offsets[code])
+            end = self._strings_start + int(self._string_offsets[code + 1])
+            value = self._strings[code] = self._mm[start:end].decode("utf-8")
+        return value
+
+    def codes(self, name):
+        """Raw code array for a column (per row, or per fragment for fragmented columns).
+
+        "int" columns have no codes and return their int64 values instead. The
+        array views the mapping and stays valid after the store is closed.
+        """
+        if self.types[name] == "int":
+            return self._sections[f"{name}.values"]
+        return self._sections[f"{name}.codes"]
+
+    def value(self, name, row):
+        kind = self.types[name]
+        if kind == "int":
+            return int(self._sections[f"{name}.values"][row])
+        if kind == "mixed":
+            kind = self._sections[f"{name}.kinds"][row]
+            if kind == INT:
+                return int(self._sections[f"{name}.values"][row])
+            if kind == NULL:
+                return None
+            if kind == JSON:
+                return json.loads(self.string(int(self.codes(name)[row])))
+        if name not in self._fragmented:
+            return self.string(int(self.codes(name)[row]))
+        offsets = self._sections[f"{name}.offsets"]
+        text = "".join(self.string(int(c)) for c in self.codes(name)[offsets[row]:offsets[row + 1]])
+        if name == "question":
+            qid = self._sections["question.qid"][row]
+            if qid >= 0:
+                text = f"Q{qid}: {text}"
+        return text
+
+    def __getitem__(self, row):
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        row %= len(self)
+        return {name: self.value(name, row) for name in self.schema}
+
+    def column(self, name):
+        """Iterate the decoded values of one column."""
+        for row in range(len(self)):
+            yield self.value(name, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def to_jsonl(self, path):
+        with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            for record in self:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Q&A JSONL to and from the dictionary-encoded store format.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    encode = sub.add_parser("encode", help="JSONL -> store")
+    encode.add_argument("input")
+    encode.add_argument("output")
+    decode = sub.add_parser("decode", help="store -> JSONL")
+    decode.add_argument("input")
+    decode.add_argument("output")
+    stats = sub.add_parser("stats", help="print row count and per-column dictionary sizes")
+    stats.add_argument("input")
+    args = parser.parse_args(argv)
+
+    if args.command == "encode":
+        rows = encode_jsonl(args.input, args.output)
+        print(f"Encoded {rows} rows: {os.path.getsize(args.input)} -> {os.path.getsize(args.output)} bytes.")
+    elif args.command == "decode":
+        with QAStore(args.input) as store:
+            store.to_jsonl(args.output)
+            print(f"Decoded {len(store)} rows to '{args.output}'.")
+    else:
+        with QAStore(args.input) as store:
+            print(json.dumps({
+                "rows": len(store),
+                "strings": len(store._string_offsets) - 1,
+                "distinct": {name: int(np.unique(store.codes(name)).size) for name in store.schema},
+            }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
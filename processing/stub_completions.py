@@ -0,0 +1,67 @@
+import argparse
+import json
+import re
+
+from aiohttp import web
+
+SEED = re.compile(r"Seed question: (.*?)\nSeed answer: (.*?)\n\nRespond", re.S)
+PASSAGE = re.compile(r"Passage:\n(.*?)\n\nRespond", re.S)
+
+
+class StubCompletions:
+    """Local stand-in for an OpenAI-compatible /v1/completions endpoint.
+
+    Every prompt gets a choice holding a JSON array of `pairs` question/answer
+    pairs that restate its seed pair (or ask about its passage), so the output
+    reads like real amplified data downstream. `fail_first` requests are answered with a 503 first, and
+    `short_every` > 0 drops the last choice of every n-th successful request, so
+    amplify.py's retry and short-response handling can be exercised offline.
+    """
+
+    def __init__(self, pairs=2, fail_first=0, short_every=0):
+        self.pairs = pairs
+        self.fail_first = fail_first
+        self.short_every = short_every
+        self.requests = 0
+        self.prompts = 0
+
+    async def completions(self, request):
+        self.requests += 1
+        if self.requests <= self.fail_first:
+            return web.Response(status=503)
+        body = await request.json()
+        prompts = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+        self.prompts += len(prompts)
+        choices = [{"index": i, "text": json.dumps(self.restate(prompt))} for i, prompt in enumerate(prompts)]
+        if self.short_every and (self.requests - self.fail_first) % self.short_every == 0:
+            choices = choices[:-1]
+        return web.json_response({"choices": choices})
+
+    def restate(self, prompt):
+        seed = SEED.search(prompt)
+        if seed:
+            question, answer = seed.groups()
+        else:
+            passage = PASSAGE.search(prompt)
+            question, answer = "What does the passage argue?", passage.group(1) if passage else "Nothing."
+        return [{"question": question if j == 0 else f"Put differently ({j}), {question}", "answer": answer} for j in range(self.pairs)]
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/v1/completions", self.completions)
+        return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a stub OpenAI-compatible completions endpoint for offline amplify runs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pairs", type=int, default=2, help="pairs returned per prompt")
+    parser.add_argument("--fail-first", type=int, default=0, help="answer the first N requests with 503")
+    parser.add_argument("--short-every", type=int, default=0, help="drop a choice from every N-th request")
+    args = parser.parse_args(argv)
+    web.run_app(StubCompletions(args.pairs, args.fail_first, args.short_every).app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+from aiohttp.test_utils import TestServer
+
+from amplify import Amplifier
+from stub_completions import StubCompletions
+
+SEEDS = 10
+
+
+class AmplifyTest(unittest.IsolatedAsyncioTestCase):
+    """Runs the amplifier against the local stub endpoint; `python -m unittest test_amplify`."""
+
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.dir.name, "seeds.jsonl")
+        self.output = os.path.join(self.dir.name, "amplified.jsonl")
+        with open(self.input, "w", encoding="utf-8") as f:
+            for i in range(SEEDS):
+                f.write(json.dumps({"question": f"Q{i}: seed?", "answer": "seed.", "source": "s.md", "timestamp": ""}) + "\n")
+
+    async def asyncTearDown(self):
+        self.dir.cleanup()
+
+    async def amplify(self, stub, limit=None):
+        server = TestServer(stub.app())
+        await server.start_server()
+        try:
+            amplifier = Amplifier(str(server.make_url("/v1")), "stub", concurrency=2, batch_size=4, retries=3, backoff=0.01)
+            return await amplifier.run(self.input, self.output, limit)
+        finally:
+            await server.close()
+
+    def rows_per_seed(self):
+        if not os.path.exists(self.output):
+            return Counter()
+        with open(self.output, encoding="utf-8") as f:
+            return Counter(json.loads(line)["seed_id"] for line in f)
+
+    def done(self):
+        with open(self.output + ".done", encoding="utf-8") as f:
+            return sorted(int(line) for line in f)
+
+    async def test_run_writes_rows_and_checkpoint(self):
+        stats = await self.amplify(StubCompletions(pairs=2))
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(self.rows_per_seed(), Counter({i: 2 for i in range(SEEDS)}))
+        self.assertEqual(self.done(), list(range(SEEDS)))
+
+    async def test_retries_unavailable_endpoint(self):
+        stats = await self.amplify(StubCompletions(fail_first=2))
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(self.done(), list(range(SEEDS)))
+
+    async def test_short_response_fails_batch(self):
+        stats = await self.amplify(StubCompletions(short_every=1))
+        self.assertEqual(stats["failed"], SEEDS)
+        self.assertEqual(self.rows_per_seed(), Counter())
+        self.assertEqual(self.done(), [])
+
+    async def test_resume_drops_rows_missing_from_checkpoint(self):
+        await self.amplify(StubCompletions(pairs=2), limit=4)
+        # A crash after the output fsync but before the checkpoint write
+        with open(self.output, "a", encoding="utf-8") as f:
+            for variant in range(2):
+                f.write(json.dumps({"question": "q", "answer": "a", "seed_id": 5, "variant": variant}) + "\n")
+
+        stub = StubCompletions(pairs=2)
+        stats = await self.amplify(stub)
+        self.assertEqual(stats["orphaned_rows"], 2)
+        self.assertEqual(stats["skipped"], 4)
+        self.assertEqual(stub.prompts, SEEDS - 4)
+        self.assertEqual(self.rows_per_seed(), Counter({i: 2 for i in range(SEEDS)}))
+        self.assertEqual(self.done(), list(range(SEEDS)))
+
+
+if __name__ == "__main__":
+    unittest.main()
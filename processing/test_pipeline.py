@@ -0,0 +1,71 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import main
+from qastore import QAStore
+
+SERVICE_STAGES = ("amplify", "curate", "validate", "export")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServicesPipelineTest(unittest.TestCase):
+    """Runs the --with-services tail of the pipeline against stub_completions.py; `python -m unittest test_pipeline`."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.build = Path(self.dir.name) / "build"
+        self.build.mkdir()
+        # Seed pairs as the generate stage would leave them (with their .fp sidecar)
+        subprocess.run([sys.executable, "qa.py", "-n", "60", "-o", self.build / "qa.jsonl"],
+                       cwd=main.HERE, check=True, stdout=subprocess.DEVNULL)
+
+        port = free_port()
+        self.stub = subprocess.Popen([sys.executable, "stub_completions.py", "--port", str(port)],
+                                     cwd=main.HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.base_url = f"http://127.0.0.1:{port}/v1"
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or self.stub.poll() is not None:
+                    raise
+                time.sleep(0.1)
+
+    def tearDown(self):
+        self.stub.terminate()
+        self.stub.wait()
+        self.dir.cleanup()
+
+    def test_amplify_to_export(self):
+        with mock.patch.object(main, "BUILD", self.build), \
+                mock.patch.object(main, "STATE", self.build / "pipeline.json"), \
+                mock.patch.dict(os.environ, {"OPENAI_BASE_URL": self.base_url}):
+            stages = [s for s in main.build_stages(with_services=True) if s.name in SERVICE_STAGES]
+            report = main.run_pipeline(stages)
+        self.assertEqual([(e["stage"], e["status"]) for e in report], [(name, "ran") for name in SERVICE_STAGES])
+
+        with open(self.build / "curated.jsonl", encoding="utf-8") as f:
+            curated = [json.loads(line) for line in f]
+        self.assertTrue(curated)
+        with QAStore(self.build / "curated.qas") as store:
+            self.assertEqual(store.types["seed_id"], "int")
+            self.assertEqual(list(store), curated)
+
+
+if __name__ == "__main__":
+    unittest.main()
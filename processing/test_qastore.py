@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import unittest
+
+from qastore import QAStore, encode_jsonl
+
+AMPLIFIED = [
+    {"question": "Q3: How do trust and reciprocity interact?", "answer": "They reinforce each other. Trust grows with reciprocity.",
+     "source": "abstract.md", "timestamp": "2025-10-20T12:13:00Z", "seed_id": 3, "variant": 0},
+    {"question": "Why does reciprocity matter?", "answer": "It sustains cooperation.",
+     "source": "abstract.md", "timestamp": "", "seed_id": 3, "variant": 1},
+]
+
+
+class QAStoreTest(unittest.TestCase):
+    """Round-trips JSONL through the store; `python -m unittest test_qastore`."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def round_trip(self, records):
+        source = os.path.join(self.dir.name, "in.jsonl")
+        store_path = os.path.join(self.dir.name, "out.qas")
+        with open(source, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        self.assertEqual(encode_jsonl(source, store_path), len(records))
+        return QAStore(store_path)
+
+    def test_amplified_rows(self):
+        with self.round_trip(AMPLIFIED) as store:
+            self.assertEqual(list(store), AMPLIFIED)
+            self.assertEqual(store.types["seed_id"], "int")
+            self.assertEqual(store.types["source"], "str")
+            self.assertEqual(store.codes("variant").tolist(), [0, 1])
+
+    def test_mixed_column(self):
+        records = [{"question": "q", "extra": value} for value in ("text", 7, None, 1.5, True, [1, "a"], 1 << 70)]
+        with self.round_trip(records) as store:
+            self.assertEqual(store.types["extra"], "mixed")
+            self.assertEqual(list(store), records)
+
+    def test_fragmented_column_must_be_string(self):
+        with self.assertRaises(ValueError):
+            self.round_trip([{"question": "q", "answer": 1}])
+
+
+if __name__ == "__main__":
+    unittest.main()
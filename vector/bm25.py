@@ -0,0 +1,214 @@
+"""Lexical BM25 search over corpus chunks, fused with vector search by reciprocal rank.
+
+    python -m vector.bm25 build processing/chunks.jsonl -o vector/bm25
+    python -m vector.bm25 query vector/bm25 "Thorngate's Postulate"
+    python -m vector.bm25 query vector/bm25 "PILAR and SCARF" --vector-index vector/npindex
+
+The index directory holds the sorted vocabulary and, per term, a run of
+(chunk row, BM25 weight) postings. Weights are computed at build time, so a
+query only sums the postings of its terms. Arrays are memory-mapped on the
+first query.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from vector.chromadb import chunk_id, iter_chunks
+from vector.embeddings import add_embedder_arguments, open_embedder
+from vector.npindex import VectorIndex
+
+TOKEN = re.compile(r"[a-z0-9]+")
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+RRF_K = 60
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+def build_index(chunks_path, output, k1=DEFAULT_K1, b=DEFAULT_B):
+    """Index a chunk JSONL (from `chunker.py --text`); returns the number of chunks."""
+    postings = {}
+    lengths = array("I")
+    docs = []
+    for row, (source, start, end, text) in enumerate(iter_chunks(chunks_path)):
+        counts = Counter(tokenize(text))
+        lengths.append(sum(counts.values()))
+        docs.append({"id": chunk_id(source, text), "source": source, "start": start, "end": end})
+        for term, tf in counts.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = (array("I"), array("H"))
+            entry[0].append(row)
+            entry[1].append(min(tf, 0xFFFF))
+
+    n_docs = len(docs)
+    lengths = np.frombuffer(lengths, dtype=np.uint32).astype(np.float32) if n_docs else np.zeros(0, np.float32)
+    norm = k1 * (1 - b + b * lengths / max(lengths.mean() if n_docs else 1.0, 1e-9))
+    terms = sorted(postings)
+    offsets = np.zeros(len(terms) + 1, dtype=np.uint64)
+    rows, weights = [], []
+    for i, term in enumerate(terms):
+        term_rows, tfs = postings[term]
+        term_rows = np.frombuffer(term_rows, dtype=np.uint32)
+        tfs = np.frombuffer(tfs, dtype=np.uint16).astype(np.float32)
+        idf = np.log(1 + (n_docs - len(term_rows) + 0.5) / (len(term_rows) + 0.5))
+        rows.append(term_rows)
+        weights.append((idf * tfs * (k1 + 1) / (tfs + norm[term_rows])).astype(np.float32))
+        offsets[i + 1] = offsets[i] + len(term_rows)
+
+    os.makedirs(output, exist_ok=True)
+    np.save(os.path.join(output, "rows.npy"), np.concatenate(rows) if rows else np.zeros(0, np.uint32))
+    np.save(os.path.join(output, "weights.npy"), np.concatenate(weights) if weights else np.zeros(0, np.float32))
+    np.save(os.path.join(output, "offsets.npy"), offsets)
+    with open(os.path.join(output, "terms.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(terms))
+    with open(os.path.join(output, "docs.jsonl"), "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(doc, ensure_ascii=False) + "\n" for doc in docs)
+    with open(os.path.join(output, "index.json"), "w", encoding="utf-8") as f:
+        json.dump({"docs": n_docs, "terms": len(terms), "k1": k1, "b": b}, f)
+    return n_docs
+
+
+class BM25Index:
+    """Read side of `build_index`; nothing but the header is read until the first query."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            self.header = json.load(f)
+        self._loaded = False
+        self._docs = None
+
+    def __len__(self):
+        return self.header["docs"]
+
+    def _load(self):
+        self.rows = np.load(os.path.join(self.path, "rows.npy"), mmap_mode="r")
+        self.weights = np.load(os.path.join(self.path, "weights.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(self.path, "offsets.npy"))
+        with open(os.path.join(self.path, "terms.txt"), encoding="utf-8") as f:
+            self.vocab = {term: i for i, term in enumerate(f.read().split("\n")) if term}
+        self._scores = np.zeros(len(self), dtype=np.float32)
+        self._loaded = True
+
+    def docs(self):
+        """Per-row chunk metadata: id, source and offsets."""
+        if self._docs is None:
+            with open(os.path.join(self.path, "docs.jsonl"), encoding="utf-8") as f:
+                self._docs = [json.loads(line) for line in f]
+        return self._docs
+
+    def _spans(self, query):
+        if not self._loaded:
+            self._load()
+        return [(self.offsets[i], self.offsets[i + 1]) for i in {self.vocab.get(t) for t in tokenize(query)} - {None}]
+
+    def idf(self, term):
+        """BM25 idf of a term (0 for terms not in the index)."""
+        if not self._loaded:
+            self._load()
+        i = self.vocab.get(term)
+        if i is None:
+            return 0.0
+        df = int(self.offsets[i + 1] - self.offsets[i])
+        return float(np.log(1 + (len(self) - df + 0.5) / (df + 0.5)))
+
+    def scores(self, query):
+        """Dense BM25 scores of every chunk for one query."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        for start, end in self._spans(query):
+            scores[self.rows[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(self, query, k=10):
+        """(rows, scores) of the k best-scoring chunks, best first; chunks sharing no term are left out."""
+        spans = self._spans(query)
+        if not spans:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        # A term's postings hold distinct rows, so plain fancy-index addition is safe
+        for start, end in spans:
+            self._scores[self.rows[start:end]] += self.weights[start:end]
+        candidates = np.unique(np.concatenate([self.rows[start:end] for start, end in spans]))
+        scores = self._scores[candidates]
+        self._scores[candidates] = 0
+        k = min(k, len(candidates))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return candidates[best].astype(np.int64), scores[best]
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K, limit=None):
+    """Fuse ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    fused = Counter()
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] += 1 / (k + rank)
+    return fused.most_common(limit)
+
+
+def hybrid_search(query, lexical, vector_index, embedder, k=10, depth=50, nprobe=None):
+    """Fuse BM25 and vector rankings of `depth` candidates each; returns [(chunk metadata, fused score)]."""
+    docs = lexical.docs()
+    rows, _ = lexical.search(query, depth)
+    found = {docs[row]["id"]: docs[row] for row in rows}
+    lexical_ids = list(found)
+    vector_rows, _ = vector_index.search(embedder.embed([query]), depth, nprobe)
+    vector_ids = []
+    for row in vector_rows[0]:
+        if row >= 0:
+            meta = vector_index.metadata(row)
+            found.setdefault(meta["id"], meta)
+            vector_ids.append(meta["id"])
+    return [(found[key], score) for key, score in reciprocal_rank_fusion([lexical_ids, vector_ids], limit=k)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query a BM25 index over corpus chunks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index a chunk JSONL")
+    build.add_argument("chunks")
+    build.add_argument("-o", "--output", default=os.path.join(os.path.dirname(__file__), "bm25"))
+    build.add_argument("--k1", type=float, default=DEFAULT_K1)
+    build.add_argument("-b", type=float, default=DEFAULT_B)
+    query = sub.add_parser("query", help="print the best chunks for a query")
+    query.add_argument("index")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--vector-index", help="npindex directory to fuse with (hybrid search)")
+    query.add_argument("--nprobe", type=int, default=None)
+    add_embedder_arguments(query)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        n_docs = build_index(args.chunks, args.output, args.k1, args.b)
+        print(f"Indexed {n_docs} chunks into '{args.output}' in {time.perf_counter() - start:.2f}s.")
+        return
+
+    lexical = BM25Index(args.index)
+    if not args.vector_index:
+        rows, scores = lexical.search(args.text, args.k)
+        docs = lexical.docs()
+        for row, score in zip(rows, scores):
+            print(f"{score:.3f}  {docs[row]['source']} [{docs[row]['start']}:{docs[row]['end']}]")
+        return
+
+    embedder = open_embedder(args)
+    try:
+        for doc, score in hybrid_search(args.text, lexical, VectorIndex(args.vector_index), embedder, args.k, nprobe=args.nprobe):
+            print(f"{score:.4f}  {doc['source']} [{doc['start']}:{doc['end']}]")
+    finally:
+        embedder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Upsert corpus chunks into an embedded, persistent ChromaDB collection.
+
+    cd processing && python ingest.py && python chunker.py --text -o chunks.jsonl
+    cd .. && python -m vector.chromadb index processing/chunks.jsonl
+    python -m vector.chromadb query "How does Respect relate to Agency?"
+
+Run as a module from the repository root: this file's name would otherwise
+shadow the chromadb package it imports.
+
+Chunk ids are content hashes of (source, text), so re-indexing embeds only
+chunks whose text is new, moves the offsets of chunks that merely shifted,
+and deletes chunks that disappeared from a re-ingested source.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+from vector.embeddings import DEFAULT_MODEL, add_embedder_arguments, open_embedder
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "chroma")
+DEFAULT_COLLECTION = "apriori-research"
+DEFAULT_BATCH = 256
+
+
+def chunk_id(source, text):
+    return hashlib.blake2b(f"{source}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def open_collection(path=DEFAULT_PATH, name=DEFAULT_COLLECTION, model_id=DEFAULT_MODEL):
+    """Persistent local collection; refuses to mix embeddings from different models."""
+    try:
+        import chromadb
+    except ImportError as exc:
+        raise SystemExit("The vector store needs chromadb: pip install chromadb") from exc
+    client = chromadb.PersistentClient(path=path)
+    # Embeddings are always supplied, so no default embedding function is loaded
+    collection = client.get_or_create_collection(
+        name, embedding_function=None, metadata={"hnsw:space": "cosine", "embedding_model": model_id},
+    )
+    stored = (collection.metadata or {}).get("embedding_model")
+    if stored != model_id:
+        raise SystemExit(f"Collection {name!r} holds {stored} embeddings, not {model_id}; use another --collection.")
+    return collection
+
+
+def iter_chunks(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["source"], record["start"], record["end"], record["text"]
+
+
+def stored_chunks(collection, batch_size=10_000):
+    """{id: metadata} for every stored chunk, read in pages."""
+    stored = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+        stored.update(zip(page["ids"], page["metadatas"]))
+        if len(page["ids"]) < batch_size:
+            return stored
+        offset += batch_size
+
+
+def sync_chunks(collection, chunks, embedder, batch_size=DEFAULT_BATCH, prune_sources=False):
+    """Bring `collection` in line with `chunks`, an iterable of (source, start, end, text).
+
+    New chunks are embedded and upserted `batch_size` at a time; unchanged chunks
+    whose offsets moved get a metadata-only update; chunks of the sources seen
+    that are no longer produced are deleted, as are whole sources missing from
+    `chunks` when `prune_sources` is set.
+    """
+    stored = stored_chunks(collection)
+    stats = {"chunks": 0, "embedded": 0, "moved": 0, "unchanged": 0, "deleted": 0}
+    seen, sources = set(), set()
+    pending, moved = [], []
+
+    def flush_pending():
+        if pending:
+            embeddings = embedder.embed([text for _, text, _ in pending])
+            collection.upsert(
+                ids=[cid for cid, _, _ in pending],
+                documents=[text for _, text, _ in pending],
+                metadatas=[meta for _, _, meta in pending],
+                embeddings=embeddings.tolist(),
+            )
+            stats["embedded"] += len(pending)
+            pending.clear()
+
+    def flush_moved():
+        if moved:
+            collection.update(ids=[cid for cid, _ in moved], metadatas=[meta for _, meta in moved])
+            stats["moved"] += len(moved)
+            moved.clear()
+
+    for source, start, end, text in chunks:
+        cid = chunk_id(source, text)
+        sources.add(source)
+        if cid in seen:
+            # Repeated passage within one source: keep the first occurrence
+            continue
+        seen.add(cid)
+        stats["chunks"] += 1
+        meta = {"source": source, "start": start, "end": end}
+        old = stored.get(cid)
+        if old is None:
+            pending.append((cid, text, meta))
+            if len(pending) >= batch_size:
+                flush_pending()
+        elif old.get("start") != start or old.get("end") != end:
+            moved.append((cid, meta))
+            if len(moved) >= batch_size:
+                flush_moved()
+        else:
+            stats["unchanged"] += 1
+    flush_pending()
+    flush_moved()
+
+    stale = [cid for cid, meta in stored.items()
+             if cid not in seen and (prune_sources or (meta or {}).get("source") in sources)]
+    for i in range(0, len(stale), batch_size):
+        collection.delete(ids=stale[i:i + batch_size])
+    stats["deleted"] = len(stale)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index corpus chunks in a local persistent ChromaDB collection.")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="ChromaDB persistence directory")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    add_embedder_arguments(parser)
+    sub = parser.add_subparsers(dest="command", required=True)
+    index = sub.add_parser("index", help="embed and upsert new chunks, delete vanished ones")
+    index.add_argument("chunks", help="JSONL from `chunker.py --text`")
+    index.add_argument("--batch-size", type=int, default=DEFAULT_BATCH, help="chunks per embed/upsert call")
+    index.add_argument("--prune-sources", action="store_true", help="also delete sources absent from the chunk file")
+    query = sub.add_parser("query", help="print the nearest chunks to a query")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    collection = open_collection(args.path, args.collection, args.model)
+    embedder = open_embedder(args)
+    try:
+        if args.command == "index":
+            stats = sync_chunks(collection, iter_chunks(args.chunks), embedder, args.batch_size, args.prune_sources)
+            stats["stored"] = collection.count()
+            print(json.dumps(stats, indent=2))
+        else:
+            result = collection.query(query_embeddings=embedder.embed([args.text]).tolist(), n_results=args.k)
+            for distance, meta, text in zip(result["distances"][0], result["metadatas"][0], result["documents"][0]):
+                print(f"{distance:.4f}  {meta['source']} [{meta['start']}:{meta['end']}]  {text[:160]!r}")
+    finally:
+        if getattr(embedder, "stats", None):
+            print(f"Embedding cache: {embedder.stats}")
+        embedder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "embeddings.sqlite")
+DEFAULT_MAX_BYTES = 1 << 30
+# SQLite's default limit on bound parameters per statement is 999 on older builds
+PARAMS_PER_QUERY = 900
+
+
+def cache_key(model_id, text):
+    return hashlib.blake2b(f"{model_id}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+
+class CachedEmbedder:
+    """Wraps an embedder with a persistent SQLite cache keyed by (model id, text hash).
+
+    Only texts missing from the cache reach the wrapped embedder, each distinct
+    text at most once per call. Entries carry a use counter; when the stored
+    vectors exceed `max_bytes`, the least recently used are evicted. `stats`
+    counts hits, misses and evictions for this process.
+    """
+
+    def __init__(self, embedder, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.embedder = embedder
+        self.model_id = embedder.model_id
+        self.max_bytes = max_bytes
+        # Callers such as vector/service.py embed from a worker thread
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.tick, self.stored_bytes = self.db.execute(
+            "SELECT COALESCE(MAX(last_used), 0), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    def _lookup(self, keys):
+        found = {}
+        for i in range(0, len(keys), PARAMS_PER_QUERY):
+            part = keys[i:i + PARAMS_PER_QUERY]
+            marks = ",".join("?" * len(part))
+            found.update(self.db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", part))
+        return found
+
+    def embed(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        keys = [cache_key(self.model_id, text) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        self.tick += 1
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        self.stats["hits"] += len(texts) - sum(key not in found for key in keys)
+        self.stats["misses"] += len(missing)
+        if missing:
+            vectors = self.embedder.embed(list(missing.values()))
+            fresh = {key: vector.astype(np.float32).tobytes() for key, vector in zip(missing, vectors)}
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, blob, self.tick) for key, blob in fresh.items()],
+            )
+            self.stored_bytes += sum(len(blob) for blob in fresh.values())
+            found.update(fresh)
+        self.db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(self.tick, key) for key in set(keys) - set(missing)])
+        if self.stored_bytes > self.max_bytes:
+            self._evict()
+        self.db.commit()
+        return np.stack([np.frombuffer(found[key], dtype=np.float32) for key in keys])
+
+    def _evict(self):
+        # Drop least recently used entries until back under 90% of the cap
+        while self.stored_bytes > self.max_bytes * 0.9:
+            rows = self.db.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 1000").fetchall()
+            if not rows:
+                break
+            drop, freed = [], 0
+            for key, size in rows:
+                if self.stored_bytes - freed <= self.max_bytes * 0.9:
+                    break
+                drop.append((key,))
+                freed += size
+            self.db.executemany("DELETE FROM embeddings WHERE key = ?", drop)
+            self.stored_bytes -= freed
+            self.stats["evicted"] += len(drop)
+
+    def close(self):
+        self.db.close()
+        self.embedder.close()
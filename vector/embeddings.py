@@ -0,0 +1,69 @@
+import os
+import time
+
+import httpx
+import numpy as np
+
+from vector.embedcache import DEFAULT_MAX_BYTES, DEFAULT_PATH as DEFAULT_CACHE, CachedEmbedder
+
+DEFAULT_BASE_URL = "http://localhost:8000/v1"
+DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
+RETRY_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class OpenAIEmbedder:
+    """Embeds text through an OpenAI-compatible /embeddings endpoint (e.g. `vllm serve --task embed`).
+
+    `embed` takes any number of texts, sends them in requests of `batch_size`
+    and returns one float32 row per text, in order.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, model=DEFAULT_MODEL, batch_size=64, retries=3, backoff=1.0, timeout=120):
+        self.url = base_url.rstrip("/") + "/embeddings"
+        self.model_id = model
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.client = httpx.Client(timeout=timeout)
+
+    def _request(self, texts):
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.client.post(self.url, json={"model": self.model_id, "input": texts})
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    data = sorted(response.json()["data"], key=lambda d: d["index"])
+                    return [d["embedding"] for d in data]
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as exc:
+                error = exc
+            if attempt == self.retries:
+                raise RuntimeError(f"embedding request failed after {attempt + 1} attempts: {error}")
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def embed(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        rows = []
+        for i in range(0, len(texts), self.batch_size):
+            rows.extend(self._request(texts[i:i + self.batch_size]))
+        return np.asarray(rows, dtype=np.float32).reshape(len(texts), -1)
+
+    def close(self):
+        self.client.close()
+
+
+def add_embedder_arguments(parser):
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL", DEFAULT_BASE_URL), help="OpenAI-compatible embeddings endpoint")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="embedding model")
+    parser.add_argument("--embedding-cache", default=DEFAULT_CACHE, help="persistent embedding cache ('' to disable)")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES >> 20, help="evict least recently used embeddings beyond this")
+
+
+def open_embedder(args):
+    """Embedder for the parsed `add_embedder_arguments` options, behind the cache unless it is disabled."""
+    embedder = OpenAIEmbedder(args.base_url, args.model)
+    if not args.embedding_cache:
+        return embedder
+    return CachedEmbedder(embedder, args.embedding_cache, args.cache_size_mb << 20)
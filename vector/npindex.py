@@ -0,0 +1,295 @@
+"""In-process vector index over a memory-mapped float32 matrix, for batch jobs.
+
+    python -m vector.npindex build processing/chunks.jsonl -o vector/npindex
+    python -m vector.npindex train-ivf vector/npindex --lists 256
+    python -m vector.npindex query vector/npindex "How does Respect relate to Agency?"
+
+An index directory holds `index.json` (dimension, row count, embedding model),
+`vectors.f32` (row-major, L2-normalized rows) and `meta.jsonl` (one metadata
+object per row). Opening maps the matrix and reads only the header. Exact
+search scores query blocks against row blocks with one matrix multiply each and
+keeps the top k with argpartition; after `train-ivf`, `nprobe` restricts the
+search to the rows of the nearest k-means lists.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from vector.chromadb import chunk_id, iter_chunks
+from vector.embeddings import add_embedder_arguments, open_embedder
+
+HEADER = "index.json"
+VECTORS = "vectors.f32"
+METADATA = "meta.jsonl"
+IVF = "ivf.npz"
+IVF_VECTORS = "ivf.f32"
+ROW_BLOCK = 1 << 16
+QUERY_BLOCK = 256
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k(scores, k):
+    """Column indices and values of the k largest scores in each row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((len(scores), 0), dtype=np.int64), np.zeros((len(scores), 0), dtype=np.float32)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def blocked_top_k(queries, n_rows, k, load_block, row_block=ROW_BLOCK, query_block=QUERY_BLOCK, score=None):
+    """Exact top k of `queries @ rows.T`, reading rows a block at a time via `load_block(start, end)`.
+
+    Each row block is scored against query blocks with one matrix multiply (or
+    `score(query_block, block)`, higher is better) and its winners are merged
+    into the running top k.
+    """
+    k = min(k, n_rows)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+    for start in range(0, n_rows, row_block):
+        block = load_block(start, min(start + row_block, n_rows))
+        rows, scores = [], []
+        for q in range(0, len(queries), query_block):
+            part = queries[q:q + query_block]
+            idx, values = top_k(score(part, block) if score else part @ block.T, k)
+            rows.append(idx + start)
+            scores.append(values)
+        merged_rows = np.concatenate([best_rows, np.concatenate(rows)], axis=1)
+        merged_scores = np.concatenate([best_scores, np.concatenate(scores)], axis=1)
+        idx, best_scores = top_k(merged_scores, k)
+        best_rows = np.take_along_axis(merged_rows, idx, axis=1)
+    return best_rows, best_scores
+
+
+class IndexWriter:
+    """Appends vectors and their metadata to a new index directory."""
+
+    def __init__(self, path, model_id):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.model_id = model_id
+        self.dim = None
+        self.count = 0
+        for name in (IVF, IVF_VECTORS, HEADER):
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+        self._vectors = open(os.path.join(path, VECTORS), "wb")
+        self._meta = open(os.path.join(path, METADATA), "w", encoding="utf-8")
+
+    def add(self, vectors, metadata):
+        vectors = normalize(vectors)
+        if len(vectors) != len(metadata):
+            raise ValueError(f"{len(vectors)} vectors but {len(metadata)} metadata rows")
+        if not len(vectors):
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+        self._vectors.write(vectors.tobytes())
+        self._meta.write("".join(json.dumps(m, ensure_ascii=False) + "\n" for m in metadata))
+        self.count += len(vectors)
+
+    def close(self):
+        self._vectors.close()
+        self._meta.close()
+        # The header goes last, so a half-written index never opens
+        with open(os.path.join(self.path, HEADER), "w", encoding="utf-8") as f:
+            json.dump({"count": self.count, "dim": self.dim or 0, "model": self.model_id, "metric": "cosine"}, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class VectorIndex:
+    """Read-only view of an index directory written by `IndexWriter`."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, HEADER), encoding="utf-8") as f:
+            self.header = json.load(f)
+        self.model_id = self.header["model"]
+        count, dim = self.header["count"], self.header["dim"]
+        if count:
+            self.vectors = np.memmap(os.path.join(path, VECTORS), dtype=np.float32, mode="r", shape=(count, dim))
+        else:
+            self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self._meta_offsets = None
+        self._rows_by_id = None
+        self._ivf = self._ivf_vectors = None
+        self._load_ivf()
+
+    def _load_ivf(self):
+        ivf_path = os.path.join(self.path, IVF)
+        if os.path.exists(ivf_path):
+            with np.load(ivf_path) as ivf:
+                self._ivf = {name: ivf[name] for name in ivf.files}
+            self._ivf_vectors = np.memmap(os.path.join(self.path, IVF_VECTORS), dtype=np.float32, mode="r", shape=self.vectors.shape)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def metadata(self, row):
+        if self._meta_offsets is None:
+            with open(os.path.join(self.path, METADATA), "rb") as f:
+                data = np.frombuffer(f.read(), dtype=np.uint8)
+            self._meta_offsets = np.concatenate([[0], np.flatnonzero(data == ord("\n")) + 1])
+        with open(os.path.join(self.path, METADATA), "rb") as f:
+            f.seek(int(self._meta_offsets[row]))
+            return json.loads(f.readline())
+
+    def rows_by_id(self):
+        """Row of each chunk id, read once from the metadata (for joining other indexes' hits)."""
+        if self._rows_by_id is None:
+            with open(os.path.join(self.path, METADATA), encoding="utf-8") as f:
+                self._rows_by_id = {json.loads(line)["id"]: row for row, line in enumerate(f)}
+        return self._rows_by_id
+
+    def search(self, queries, k=10, nprobe=None):
+        """(rows, scores), each shaped (len(queries), k), for a batch of query vectors.
+
+        With `nprobe` and a trained IVF, only the `nprobe` nearest lists are scanned.
+        """
+        queries = normalize(np.atleast_2d(queries))
+        if nprobe is not None and self._ivf is not None:
+            return self._search_ivf(queries, k, nprobe)
+        return blocked_top_k(queries, len(self), k, lambda start, end: np.asarray(self.vectors[start:end]))
+
+    def _search_ivf(self, queries, k, nprobe):
+        centroids, members, offsets = self._ivf["centroids"], self._ivf["members"], self._ivf["offsets"]
+        k = min(k, len(self))
+        probes, _ = top_k(queries @ centroids.T, nprobe)
+        nprobe = probes.shape[1]
+        candidate_rows = np.full((len(queries), nprobe * k), -1, dtype=np.int64)
+        candidate_scores = np.full((len(queries), nprobe * k), -np.inf, dtype=np.float32)
+        # Visit each probed list once, scoring every query that probes it in one multiply
+        pairs = np.argsort(probes.ravel(), kind="stable")
+        bounds = np.searchsorted(probes.ravel()[pairs], np.arange(len(centroids) + 1))
+        for c in np.flatnonzero(np.diff(bounds)):
+            start, end = offsets[c], offsets[c + 1]
+            if start == end:
+                continue
+            selected = pairs[bounds[c]:bounds[c + 1]]
+            qs, slots = selected // nprobe, selected % nprobe
+            idx, values = top_k(queries[qs] @ np.asarray(self._ivf_vectors[start:end]).T, k)
+            cols = slots[:, None] * k + np.arange(idx.shape[1])
+            candidate_rows[qs[:, None], cols] = members[start + idx]
+            candidate_scores[qs[:, None], cols] = values
+        idx, scores = top_k(candidate_scores, k)
+        return np.take_along_axis(candidate_rows, idx, axis=1), scores
+
+    def train_ivf(self, n_lists=256, iterations=10, sample=100_000, seed=0):
+        """Spherical k-means over a sample of rows, then assign every row to its nearest centroid."""
+        rng = np.random.default_rng(seed)
+        n_lists = min(n_lists, len(self))
+        picked = np.sort(rng.choice(len(self), min(sample, len(self)), replace=False))
+        data = np.asarray(self.vectors[picked])
+        centroids = data[rng.choice(len(data), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            counts = np.bincount(assign, minlength=n_lists)
+            empty = counts == 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.zeros_like(centroids)
+            sums[~empty] = np.add.reduceat(data[np.argsort(assign, kind="stable")], starts[~empty])
+            # Reseed empty lists with random rows
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+            centroids = normalize(sums)
+
+        assign = np.concatenate([
+            np.argmax(np.asarray(self.vectors[s:s + ROW_BLOCK]) @ centroids.T, axis=1)
+            for s in range(0, len(self), ROW_BLOCK)
+        ])
+        members = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+        # Rows are also stored in list order so each probed list is one contiguous read
+        with open(os.path.join(self.path, IVF_VECTORS), "wb") as f:
+            for s in range(0, len(members), ROW_BLOCK):
+                f.write(np.asarray(self.vectors[members[s:s + ROW_BLOCK]]).tobytes())
+        np.savez(os.path.join(self.path, IVF), centroids=centroids, members=members, offsets=offsets)
+        self._load_ivf()
+        return offsets
+
+
+def build_from_chunks(chunks_path, output, embedder, batch_size=256):
+    """Embed a chunk JSONL (from `chunker.py --text`) into a new index; returns the row count."""
+    with IndexWriter(output, embedder.model_id) as writer:
+        batch = []
+        for source, start, end, text in iter_chunks(chunks_path):
+            batch.append((source, start, end, text))
+            if len(batch) == batch_size:
+                _add_chunks(writer, embedder, batch)
+                batch = []
+        _add_chunks(writer, embedder, batch)
+    return writer.count
+
+
+def _add_chunks(writer, embedder, batch):
+    if batch:
+        writer.add(embedder.embed([text for *_, text in batch]), [
+            {"id": chunk_id(source, text), "source": source, "start": start, "end": end, "text": text}
+            for source, start, end, text in batch
+        ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query a memory-mapped NumPy vector index.")
+    add_embedder_arguments(parser)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="embed a chunk JSONL into a new index")
+    build.add_argument("chunks")
+    build.add_argument("-o", "--output", default=os.path.join(os.path.dirname(__file__), "npindex"))
+    build.add_argument("--batch-size", type=int, default=256)
+    train = sub.add_parser("train-ivf", help="cluster the index for approximate search")
+    train.add_argument("index")
+    train.add_argument("--lists", type=int, default=256)
+    train.add_argument("--iterations", type=int, default=10)
+    query = sub.add_parser("query", help="print the nearest rows to a query")
+    query.add_argument("index")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--nprobe", type=int, default=None, help="IVF lists to scan (default: exact search)")
+    args = parser.parse_args(argv)
+
+    if args.command == "train-ivf":
+        start = time.perf_counter()
+        sizes = np.diff(VectorIndex(args.index).train_ivf(args.lists, args.iterations))
+        print(f"Trained {len(sizes)} lists (largest {sizes.max()}, mean {sizes.mean():.0f}) in {time.perf_counter() - start:.1f}s.")
+        return
+
+    embedder = open_embedder(args)
+    try:
+        if args.command == "build":
+            print(f"Indexed {build_from_chunks(args.chunks, args.output, embedder, args.batch_size)} chunks into '{args.output}'.")
+        else:
+            index = VectorIndex(args.index)
+            if index.model_id != args.model:
+                raise SystemExit(f"Index holds {index.model_id} embeddings, not {args.model}.")
+            rows, scores = index.search(embedder.embed([args.text]), args.k, args.nprobe)
+            for row, score in zip(rows[0], scores[0]):
+                if row >= 0:
+                    meta = index.metadata(row)
+                    print(f"{score:.4f}  {meta['source']} [{meta['start']}:{meta['end']}]  {meta['text'][:160]!r}")
+    finally:
+        if getattr(embedder, "stats", None):
+            print(f"Embedding cache: {embedder.stats}")
+        embedder.close()
+
+
+if __name__ == "__main__":
+    main()
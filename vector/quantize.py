@@ -0,0 +1,198 @@
+"""Quantized copies of an npindex for low-memory search with exact float32 re-ranking.
+
+    python -m vector.quantize build vector/npindex          # write int8 and binary codes
+    python -m vector.quantize report vector/npindex         # recall vs peak memory table
+
+int8 stores each dimension scaled by its largest magnitude (4x smaller than
+float32); binary keeps only signs, packed 8 per byte (32x smaller). Only the
+codes are loaded into memory. The coarse search scores int8 codes in small
+blocks cast to float32 for BLAS (numpy's integer matmul has no BLAS path and is
+far slower), and binary codes by Hamming distance to the query's signs with
+XOR and popcount. The best `rerank * k` candidates are then re-scored exactly
+from float32 rows read from disk, so the float32 matrix is never paged in.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vector.npindex import ROW_BLOCK, VECTORS, VectorIndex, blocked_top_k, normalize, top_k
+
+INT8 = "vectors.i8"
+INT8_SCALE = "int8_scale.npy"
+BINARY = "vectors.b1"
+MODES = ("int8", "binary")
+# Coarse-search blocks: rows cast to float32 at a time (6 MB at 384 dims), and
+# rows x queries per Hamming pass, small enough for the temporaries to stay in cache
+INT8_BLOCK = 4096
+BINARY_BLOCK, BINARY_QUERIES = 4096, 16
+
+
+def build_codes(index):
+    """Write int8 and packed-sign codes next to the index's float32 matrix."""
+    n, dim = index.vectors.shape
+    scale = np.zeros(dim, dtype=np.float32)
+    for start in range(0, n, ROW_BLOCK):
+        scale = np.maximum(scale, np.abs(np.asarray(index.vectors[start:start + ROW_BLOCK])).max(axis=0))
+    scale = np.maximum(scale, 1e-12) / 127
+    np.save(os.path.join(index.path, INT8_SCALE), scale)
+    with open(os.path.join(index.path, INT8), "wb") as i8, open(os.path.join(index.path, BINARY), "wb") as b1:
+        for start in range(0, n, ROW_BLOCK):
+            block = np.asarray(index.vectors[start:start + ROW_BLOCK])
+            i8.write(np.clip(np.rint(block / scale), -127, 127).astype(np.int8).tobytes())
+            b1.write(np.packbits(block > 0, axis=1).tobytes())
+
+
+def sign_words(packed):
+    """Packed sign bytes as uint64 words, each row zero-padded to a whole word."""
+    pad = -packed.shape[1] % 8
+    if pad:
+        packed = np.concatenate([packed, np.zeros((len(packed), pad), dtype=np.uint8)], axis=1)
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def hamming_similarity(query_words, block_words):
+    """Negated Hamming distances between (queries, words) and a transposed (words, rows) block."""
+    distance = np.zeros((len(query_words), block_words.shape[1]), dtype=np.uint16)
+    xor = np.empty(distance.shape, dtype=np.uint64)
+    bits = np.empty(distance.shape, dtype=np.uint8)
+    for w in range(block_words.shape[0]):
+        np.bitwise_xor(query_words[:, w, None], block_words[w], out=xor)
+        np.bitwise_count(xor, out=bits)
+        distance += bits
+    return np.negative(distance, dtype=np.int32)
+
+
+def read_rows(f, rows, dim):
+    """Float32 rows of an open, unbuffered vectors file.
+
+    Reading leaves nothing resident, whereas indexing the memmap can fault in
+    much of the file, even for a few hundred scattered rows.
+    """
+    out = np.empty((len(rows), dim), dtype=np.float32)
+    for i, row in enumerate(np.asarray(rows).tolist()):
+        f.seek(row * dim * 4)
+        f.readinto(out[i])
+    return out
+
+
+class QuantizedIndex:
+    """Search an npindex through its int8 or binary codes, re-ranking from the float32 rows."""
+
+    def __init__(self, index, mode="int8"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.index = index if isinstance(index, VectorIndex) else VectorIndex(index)
+        self.mode = mode
+        n, self.dim = self.index.vectors.shape
+        path = self.index.path
+        codes_path = os.path.join(path, INT8 if mode == "int8" else BINARY)
+        if not os.path.exists(codes_path) or os.path.getmtime(codes_path) < os.path.getmtime(os.path.join(path, VECTORS)):
+            raise ValueError(f"{codes_path} is missing or older than the index; run `python -m vector.quantize build {path}`")
+        if mode == "int8":
+            self.codes = np.fromfile(os.path.join(path, INT8), dtype=np.int8).reshape(n, self.dim)
+            self.scale = np.load(os.path.join(path, INT8_SCALE))
+        else:
+            self.codes = sign_words(np.fromfile(os.path.join(path, BINARY), dtype=np.uint8).reshape(n, -1))
+            self.scale = None
+
+    def _coarse(self, queries, depth):
+        if self.mode == "int8":
+            # Folding the int8 scale into the query keeps each block a plain cast
+            return blocked_top_k(queries * self.scale, len(self.codes), depth,
+                                 lambda start, end: self.codes[start:end].astype(np.float32), row_block=INT8_BLOCK)
+        return blocked_top_k(sign_words(np.packbits(queries > 0, axis=1)), len(self.codes), depth,
+                             lambda start, end: np.ascontiguousarray(self.codes[start:end].T),
+                             row_block=BINARY_BLOCK, query_block=BINARY_QUERIES, score=hamming_similarity)
+
+    def search(self, queries, k=10, rerank=4):
+        """(rows, scores) like `VectorIndex.search`; `rerank * k` coarse candidates are re-scored exactly."""
+        queries = normalize(np.atleast_2d(queries))
+        candidates, _ = self._coarse(queries, max(k, k * rerank))
+        sorted_candidates = np.sort(candidates, axis=1)
+        exact = np.zeros(sorted_candidates.shape, dtype=np.float32)
+        with open(os.path.join(self.index.path, VECTORS), "rb", buffering=0) as f:
+            for i, (rows, query) in enumerate(zip(sorted_candidates, queries)):
+                exact[i] = read_rows(f, rows, self.dim) @ query
+        idx, scores = top_k(exact, k)
+        return np.take_along_axis(sorted_candidates, idx, axis=1), scores
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round((peak if sys.platform == "darwin" else peak * 1024) / 2**20, 1)
+
+
+def _measure(path, mode, rerank, queries, k):
+    # Runs in a fresh process, so the peak RSS is this setting's alone
+    index = VectorIndex(path)
+    searcher = index if mode == "float32" else QuantizedIndex(index, mode)
+    start = time.perf_counter()
+    found, _ = searcher.search(queries, k) if mode == "float32" else searcher.search(queries, k, rerank)
+    return found, time.perf_counter() - start, _peak_rss_mb()
+
+
+def recall_report(index, n_queries=500, k=10, noise=0.5, seed=0, reranks=(1, 4, 16)):
+    """Recall@k against exact search, peak resident memory and throughput for each setting.
+
+    Queries are sampled rows with Gaussian noise of relative size `noise`, so they
+    resemble but do not coincide with stored vectors. Each setting runs in its
+    own process; its peak RSS includes the interpreter and numpy.
+    """
+    rng = np.random.default_rng(seed)
+    n, dim = index.vectors.shape
+    rows = np.sort(rng.choice(n, min(n_queries, n), replace=False))
+    with open(os.path.join(index.path, VECTORS), "rb", buffering=0) as f:
+        base = read_rows(f, rows, dim)
+    queries = normalize(base + noise * rng.standard_normal(base.shape, dtype=np.float32) / np.sqrt(dim))
+
+    settings = [("float32", None)] + [(mode, rerank) for mode in MODES for rerank in reranks]
+    results = []
+    truth = None
+    for mode, rerank in settings:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            found, seconds, peak_mb = pool.submit(_measure, index.path, mode, rerank, queries, k).result()
+        if truth is None:
+            truth = found
+        hits = sum(len(set(a) & set(b)) for a, b in zip(truth, found))
+        results.append({
+            "mode": mode, "rerank": rerank, "recall": round(hits / truth.size, 4),
+            "peak_rss_mb": peak_mb, "qps": round(len(queries) / seconds, 1),
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantize an npindex and measure recall against memory.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="write int8 and binary codes for an index")
+    build.add_argument("index")
+    report = sub.add_parser("report", help="recall@k vs peak memory for each mode and re-rank depth")
+    report.add_argument("index")
+    report.add_argument("-k", type=int, default=10)
+    report.add_argument("--queries", type=int, default=500)
+    report.add_argument("--noise", type=float, default=0.5, help="relative noise added to sampled rows to form queries")
+    report.add_argument("--rerank", type=int, nargs="+", default=[1, 4, 16], help="candidates re-ranked, as multiples of k")
+    args = parser.parse_args(argv)
+
+    index = VectorIndex(args.index)
+    if args.command == "build":
+        start = time.perf_counter()
+        build_codes(index)
+        print(f"Quantized {len(index)} rows in {time.perf_counter() - start:.1f}s.")
+        return
+
+    print(f"{'mode':>8} {'rerank':>6} {'recall@' + str(args.k):>10} {'peak RSS MB':>12} {'qps':>10}")
+    for row in recall_report(index, args.queries, args.k, args.noise, reranks=args.rerank):
+        print(f"{row['mode']:>8} {row['rerank'] or '-':>6} {row['recall']:>10.4f} {row['peak_rss_mb']:>12.1f} {row['qps']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
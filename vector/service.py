@@ -0,0 +1,248 @@
+"""Shared localhost retrieval service over the vector/ indexes.
+
+    python -m vector.service --index vector/npindex --bm25 vector/bm25
+    curl -s localhost:8900/search -d '{"query": "Thorngate", "k": 5, "mode": "hybrid"}'
+    curl -s localhost:8900/stats
+
+One process holds the embedder, the npindex (optionally through its quantized
+codes) and the BM25 index. Queries arriving within `--max-wait-ms` of each
+other are coalesced into one embedding call and one batched index search.
+Recent results are kept in an LRU cache, and /stats reports latency
+percentiles, cache hit rate and batch sizes.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+from aiohttp import web
+
+from vector.bm25 import BM25Index, reciprocal_rank_fusion
+from vector.embeddings import add_embedder_arguments, open_embedder
+from vector.npindex import VectorIndex
+from vector.quantize import QuantizedIndex
+
+MODES = ("vector", "lexical", "hybrid")
+DEFAULT_PORT = 8900
+MAX_K = 100
+
+
+def _settle(future, result=None, exception=None):
+    # A cancelled future (its client disconnected) must not take the batcher down with InvalidStateError
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+def _input_error(exc):
+    """Whether a failed batch may be down to one request's input rather than the endpoint or index."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.is_client_error
+    return isinstance(exc, ValueError)
+
+
+class RetrievalService:
+    def __init__(self, embedder, index, lexical=None, quantized=None, max_batch=64, max_wait=0.005,
+                 cache_size=10_000, depth=50, max_k=MAX_K):
+        self.embedder = embedder
+        self.index = index
+        self.searcher = quantized or index
+        self.lexical = lexical
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self.depth = depth
+        self.max_k = max_k
+        self.cache = OrderedDict()
+        self.latencies = deque(maxlen=10_000)
+        self.batch_sizes = deque(maxlen=10_000)
+        self.counts = {"requests": 0, "cache_hits": 0, "batches": 0}
+        # One worker: the embedder's cache connection and numpy buffers are not shared across threads
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.queue = None
+
+    def _result(self, row, score):
+        meta = self.index.metadata(int(row))
+        return {"id": meta["id"], "source": meta["source"], "start": meta["start"], "end": meta["end"],
+                "score": float(score), "text": meta.get("text")}
+
+    def _lexical(self, query, k):
+        # Same shape as `_result`; the text comes from the vector index, as BM25 keeps none
+        docs = self.lexical.docs()
+        rows_by_id = self.index.rows_by_id()
+        rows, scores = self.lexical.search(query, k)
+        hits = []
+        for row, score in zip(rows, scores):
+            doc = docs[row]
+            vector_row = rows_by_id.get(doc["id"])
+            text = self.index.metadata(vector_row).get("text") if vector_row is not None else None
+            hits.append({"id": doc["id"], "source": doc["source"], "start": doc["start"], "end": doc["end"],
+                         "score": float(score), "text": text})
+        return hits
+
+    def _search_batch(self, requests):
+        """Runs in the worker thread: one embedding call and one index search for the whole batch."""
+        needs_vectors = [r for r in requests if r["mode"] != "lexical"]
+        vector_hits = {}
+        if needs_vectors:
+            embeddings = self.embedder.embed([r["query"] for r in needs_vectors])
+            depth = max(max(r["k"] for r in needs_vectors), self.depth)
+            rows, scores = self.searcher.search(embeddings, depth)
+            for r, row_list, score_list in zip(needs_vectors, rows, scores):
+                vector_hits[id(r)] = [self._result(row, score) for row, score in zip(row_list, score_list) if row >= 0]
+
+        results = []
+        for r in requests:
+            if r["mode"] == "vector":
+                results.append(vector_hits[id(r)][:r["k"]])
+            elif r["mode"] == "lexical":
+                results.append(self._lexical(r["query"], r["k"]))
+            else:
+                lexical = self._lexical(r["query"], self.depth)
+                found = {hit["id"]: hit for hit in vector_hits[id(r)]}
+                for hit in lexical:
+                    found.setdefault(hit["id"], hit)
+                fused = reciprocal_rank_fusion([[h["id"] for h in lexical], [h["id"] for h in vector_hits[id(r)]]], limit=r["k"])
+                results.append([{**found[key], "score": score} for key, score in fused])
+        return results
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Handlers whose client went away have cancelled their futures
+            batch = [(r, future) for r, future in batch if not future.done()]
+            if not batch:
+                continue
+            self.counts["batches"] += 1
+            self.batch_sizes.append(len(batch))
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self._search_batch, [r for r, _ in batch])
+        except Exception as exc:
+            if len(batch) == 1 or not _input_error(exc):
+                # An unreachable or failing endpoint fails every request alike; rerunning them
+                # one at a time would only repeat the embedder's retries and backoff
+                for _, future in batch:
+                    _settle(future, exception=exc)
+                return
+            # Halve the batch until the request whose input was rejected is on its own
+            middle = len(batch) // 2
+            await self._run_batch(batch[:middle])
+            await self._run_batch(batch[middle:])
+            return
+        for (_, future), result in zip(batch, results):
+            _settle(future, result)
+
+    async def search(self, query, k=10, mode="hybrid"):
+        key = (mode, k, query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.counts["cache_hits"] += 1
+            return cached
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(({"query": query, "k": k, "mode": mode}, future))
+        result = await future
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    async def handle_search(self, request):
+        start = time.perf_counter()
+        try:
+            body = await request.json()
+            query, k, mode = body["query"], body.get("k", 10), body.get("mode", "hybrid")
+        except (ValueError, KeyError, TypeError):
+            raise web.HTTPBadRequest(text='expected JSON {"query": str, "k": int, "mode": str}')
+        if not isinstance(query, str) or not query.strip():
+            raise web.HTTPBadRequest(text="query must be a non-empty string")
+        if not isinstance(k, int) or isinstance(k, bool) or not 1 <= k <= self.max_k:
+            raise web.HTTPBadRequest(text=f"k must be an integer from 1 to {self.max_k}")
+        if not isinstance(mode, str) or mode not in MODES or (mode != "vector" and self.lexical is None):
+            raise web.HTTPBadRequest(text=f"unsupported mode {mode!r}; lexical and hybrid need --bm25")
+        self.counts["requests"] += 1
+        results = await self.search(query, k, mode)
+        self.latencies.append(time.perf_counter() - start)
+        return web.json_response({"results": results})
+
+    async def handle_health(self, request):
+        return web.json_response({"ok": True, "rows": len(self.index)})
+
+    async def handle_stats(self, request):
+        stats = dict(self.counts, cache_entries=len(self.cache))
+        if self.latencies:
+            p50, p90, p99 = np.percentile(np.array(self.latencies) * 1000, [50, 90, 99])
+            stats["latency_ms"] = {"p50": round(p50, 3), "p90": round(p90, 3), "p99": round(p99, 3)}
+        if self.batch_sizes:
+            stats["mean_batch"] = round(float(np.mean(self.batch_sizes)), 2)
+        if getattr(self.embedder, "stats", None):
+            stats["embedding_cache"] = self.embedder.stats
+        return web.json_response(stats)
+
+    def app(self):
+        async def start_batcher(app):
+            self.queue = asyncio.Queue()
+            app["batcher"] = asyncio.create_task(self.batcher())
+            yield
+            app["batcher"].cancel()
+            self.executor.shutdown()
+            self.embedder.close()
+
+        app = web.Application()
+        app.add_routes([
+            web.post("/search", self.handle_search),
+            web.get("/stats", self.handle_stats),
+            web.get("/health", self.handle_health),
+        ])
+        app.cleanup_ctx.append(start_batcher)
+        return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve batched, cached retrieval over the local vector indexes.")
+    parser.add_argument("--index", required=True, help="npindex directory")
+    parser.add_argument("--bm25", default=None, help="BM25 index directory (enables lexical and hybrid modes)")
+    parser.add_argument("--quantized", choices=("int8", "binary"), default=None, help="search through quantized codes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=64, help="queries per embedding call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="how long to hold a batch open for more queries")
+    parser.add_argument("--cache-entries", type=int, default=10_000, help="LRU result cache size")
+    parser.add_argument("--max-k", type=int, default=MAX_K, help="largest k a request may ask for")
+    add_embedder_arguments(parser)
+    args = parser.parse_args(argv)
+
+    index = VectorIndex(args.index)
+    if index.model_id != args.model:
+        raise SystemExit(f"Index holds {index.model_id} embeddings, not {args.model}.")
+    quantized = QuantizedIndex(index, args.quantized) if args.quantized else None
+    service = RetrievalService(
+        open_embedder(args), index, BM25Index(args.bm25) if args.bm25 else None, quantized,
+        max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000, cache_size=args.cache_entries,
+        max_k=args.max_k,
+    )
+    web.run_app(service.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()